@@ -9,7 +9,8 @@ from app.models.user import User
 from app.models.product import Product, PriceHistory
 from app.models.order import Order
 # from app.models.analytics import DemandMetrics  # Disabled
-from app.api.auth import get_current_user
+from app.models.analytics import DailyRevenueRollup
+from app.api.auth import get_current_user, invalidate_cached_user
 
 router = APIRouter()
 
@@ -25,10 +26,12 @@ async def get_dashboard_stats(
     # Get basic stats
     total_products = db.query(Product).count()
     total_users = db.query(User).count()
-    total_orders = db.query(Order).count()
     
-    # Calculate total revenue
-    total_revenue = db.query(func.sum(Order.total_amount)).scalar() or 0.0
+    # Order count and revenue from the daily rollup instead of scanning orders
+    total_orders, total_revenue = db.query(
+        func.coalesce(func.sum(DailyRevenueRollup.order_count), 0),
+        func.coalesce(func.sum(DailyRevenueRollup.revenue), 0.0)
+    ).one()
     
     return {
         "total_products": total_products,
@@ -109,4 +112,7 @@ async def toggle_user_status(
     setattr(user, 'is_active', not current_status)
     db.commit()
     
+    # Drop the cached copy so the change applies to the user's very next request
+    invalidate_cached_user(user.username)
+    
     return {"message": f"User {getattr(user, 'username', 'Unknown')} status updated to {'active' if getattr(user, 'is_active', True) else 'inactive'}"} 
\ No newline at end of file
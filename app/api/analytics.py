@@ -1,18 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from typing import List, Dict
+from sqlalchemy import func, desc, case
+from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 
 from app.core.database import get_db
 from app.models.user import User
-from app.models.product import Product, PriceHistory
-from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.models.order import Order, OrderStatus
+from app.models.analytics import DailyRevenueRollup, DailyProductSalesRollup, DailyPriceChangeRollup
 from app.api.auth import get_current_user
-from app.ml.train_model import ModelTrainer
+from app.ml.training_jobs import submit_training_job, get_training_job
+from app.ml.prediction_cache import get_shared_prediction_cache
+from app.scrapers.catalog_refresh import load_checkpoint
+from app.core import metrics, rollups  # rollups registers the session hooks that maintain the tables
+from app.core.timeseries import (
+    GRANULARITIES, bucket_expression, bucket_range, count_buckets, fill_series, next_bucket
+)
 
 router = APIRouter()
 
+# Orders that count as revenue (stored by enum name, so compare enum members, not strings)
+REVENUE_STATUSES = [OrderStatus.CONFIRMED, OrderStatus.SHIPPED, OrderStatus.DELIVERED]
+REVENUE_STATUS_VALUES = [status.value for status in REVENUE_STATUSES]
+MAX_SERIES_BUCKETS = 5000
+PRODUCT_SORT_FIELDS = ("revenue", "sales", "price_change")
+
 @router.get("/metrics")
 async def get_analytics_metrics(
     current_user: User = Depends(get_current_user),
@@ -23,21 +36,21 @@ async def get_analytics_metrics(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     # Total Revenue
-    total_revenue = db.query(func.sum(Order.total_amount)).filter(
-        Order.status.in_(['completed', 'shipped', 'delivered'])
+    total_revenue = db.query(func.sum(DailyRevenueRollup.revenue)).filter(
+        DailyRevenueRollup.status.in_(REVENUE_STATUS_VALUES)
     ).scalar() or 0
     
     # Total Orders
-    total_orders = db.query(func.count(Order.id)).scalar() or 0
+    total_orders = db.query(func.sum(DailyRevenueRollup.order_count)).scalar() or 0
     
     # Active Users (users with orders in last 30 days)
-    thirty_days_ago = datetime.now() - timedelta(days=30)
+    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
     active_users = db.query(func.count(func.distinct(Order.user_id))).filter(
         Order.created_at >= thirty_days_ago
     ).scalar() or 0
     
     # Price Changes (from price history)
-    price_changes = db.query(func.count(PriceHistory.id)).scalar() or 0
+    price_changes = db.query(func.sum(DailyPriceChangeRollup.change_count)).scalar() or 0
     
     return {
         "total_revenue": float(total_revenue),
@@ -55,41 +68,25 @@ async def get_chart_data(
     if current_user.role.value != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    # Revenue data for last 7 days
-    revenue_data = []
-    revenue_labels = []
-    for i in range(7):
-        date = datetime.now() - timedelta(days=i)
-        start_date = date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_date = start_date + timedelta(days=1)
-        
-        daily_revenue = db.query(func.sum(Order.total_amount)).filter(
-            Order.created_at >= start_date,
-            Order.created_at < end_date,
-            Order.status.in_(['completed', 'shipped', 'delivered'])
-        ).scalar() or 0
-        
-        revenue_data.insert(0, float(daily_revenue))
-        revenue_labels.insert(0, date.strftime('%b %d'))
+    # Revenue data for last 7 days; order times and rollup days are UTC
+    now = datetime.utcnow()
+    revenue = _revenue_series(db, now - timedelta(days=6), now, "day")
     
     # Price changes data
-    increases = db.query(func.count(PriceHistory.id)).filter(
-        PriceHistory.reason == 'ai_dynamic_pricing'
-    ).scalar() or 0
-    
-    decreases = db.query(func.count(PriceHistory.id)).filter(
-        PriceHistory.reason == 'competition'
-    ).scalar() or 0
+    changes_by_reason = dict(db.query(
+        DailyPriceChangeRollup.reason, func.sum(DailyPriceChangeRollup.change_count)
+    ).filter(
+        DailyPriceChangeRollup.reason.in_(['ai_dynamic_pricing', 'competition'])
+    ).group_by(DailyPriceChangeRollup.reason).all())
+    increases = changes_by_reason.get('ai_dynamic_pricing') or 0
+    decreases = changes_by_reason.get('competition') or 0
     
     stable = db.query(func.count(Product.id)).filter(
         Product.is_active == True
     ).scalar() - (increases + decreases)
     
     return {
-        "revenue": {
-            "labels": revenue_labels,
-            "data": revenue_data
-        },
+        "revenue": revenue,
         "price_changes": {
             "increases": increases,
             "decreases": decreases,
@@ -100,82 +97,131 @@ async def get_chart_data(
 @router.get("/revenue")
 async def get_revenue_data(
     period: str = "7d",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    granularity: str = "day",
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get revenue data for different periods"""
+    """Get revenue data for a period or an explicit start/end range"""
     if current_user.role.value != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    
     days = {"7d": 7, "30d": 30, "90d": 90}.get(period, 7)
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=days - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if count_buckets(start, end, granularity) > MAX_SERIES_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Range too large; at most {MAX_SERIES_BUCKETS} {granularity} buckets")
     
-    revenue_data = []
-    revenue_labels = []
-    
-    for i in range(days):
-        date = datetime.now() - timedelta(days=i)
-        start_date = date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_date = start_date + timedelta(days=1)
-        
-        daily_revenue = db.query(func.sum(Order.total_amount)).filter(
-            Order.created_at >= start_date,
-            Order.created_at < end_date,
-            Order.status.in_(['completed', 'shipped', 'delivered'])
-        ).scalar() or 0
-        
-        revenue_data.insert(0, float(daily_revenue))
-        revenue_labels.insert(0, date.strftime('%b %d'))
+    return _revenue_series(db, start, end, granularity)
+
+def _revenue_series(db: Session, start: datetime, end: datetime, granularity: str) -> Dict[str, List]:
+    """Revenue per bucket between start and end from a single GROUP BY query"""
+    buckets = bucket_range(start, end, granularity)
+    range_end = next_bucket(buckets[-1], granularity)
+    dialect_name = db.get_bind().dialect.name
     
-    return {
-        "labels": revenue_labels,
-        "data": revenue_data
-    }
+    if granularity == "hour":
+        # Finer than the daily rollup, so aggregate the orders themselves
+        bucket = bucket_expression(Order.created_at, dialect_name, granularity).label('bucket')
+        rows = db.query(bucket, func.sum(Order.total_amount)).filter(
+            Order.created_at >= buckets[0],
+            Order.created_at < range_end,
+            Order.status.in_(REVENUE_STATUSES)
+        ).group_by(bucket).all()
+    else:
+        bucket = bucket_expression(DailyRevenueRollup.day, dialect_name, granularity).label('bucket')
+        rows = db.query(bucket, func.sum(DailyRevenueRollup.revenue)).filter(
+            DailyRevenueRollup.day >= buckets[0].date(),
+            DailyRevenueRollup.day < range_end.date(),
+            DailyRevenueRollup.status.in_(REVENUE_STATUS_VALUES)
+        ).group_by(bucket).all()
+    return fill_series(rows, buckets, granularity)
 
 @router.get("/products")
 async def get_product_analytics(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    sort_by: Optional[str] = None,
+    order: str = "desc",
+    category: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get product performance analytics"""
+    """Get product performance analytics; every product unless limit is given"""
     if current_user.role.value != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    products = db.query(Product).filter(Product.is_active == True).all()
-    
-    product_analytics = []
-    for product in products:
-        # Get sales count and revenue for this product
-        sales_data = db.query(
-            func.count(OrderItem.id).label('sales_count'),
-            func.sum(OrderItem.price_at_time * OrderItem.quantity).label('revenue')
-        ).join(Order).filter(
-            OrderItem.product_id == product.id,
-            Order.status.in_(['completed', 'shipped', 'delivered'])
-        ).first()
-        
-        sales_count = getattr(sales_data, 'sales_count', 0) if sales_data else 0
-        revenue = float(getattr(sales_data, 'revenue', 0) or 0) if sales_data else 0.0
-        
-        # Calculate price change percentage
-        price_change = 0
-        base_price = getattr(product, 'base_price', 0) or 0
-        if base_price > 0:
-            current_price = getattr(product, 'current_price', 0) or 0
-            price_change = ((current_price - base_price) / base_price) * 100
-        
-        product_analytics.append({
-            "id": getattr(product, 'id', 0),
-            "name": getattr(product, 'name', ''),
-            "category": getattr(product, 'category', ''),
-            "base_price": float(base_price),
-            "current_price": float(getattr(product, 'current_price', 0) or 0),
-            "price_change": round(price_change, 2),
-            "sales_count": sales_count,
-            "revenue": revenue,
-            "stock_quantity": getattr(product, 'stock_quantity', 0) or 0
-        })
-    
-    return product_analytics
+    if sort_by is not None and sort_by not in PRODUCT_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of {', '.join(PRODUCT_SORT_FIELDS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    
+    # Sales count and revenue for every product in one aggregate over the daily rollup
+    sales = db.query(
+        DailyProductSalesRollup.product_id.label('product_id'),
+        func.sum(DailyProductSalesRollup.item_count).label('sales_count'),
+        func.sum(DailyProductSalesRollup.revenue).label('revenue')
+    ).filter(
+        DailyProductSalesRollup.status.in_(REVENUE_STATUS_VALUES)
+    ).group_by(DailyProductSalesRollup.product_id).subquery()
+    
+    sales_count = func.coalesce(sales.c.sales_count, 0)
+    revenue = func.coalesce(sales.c.revenue, 0.0)
+    price_change = case(
+        (Product.base_price > 0, (Product.current_price - Product.base_price) * 100.0 / Product.base_price),
+        else_=0.0
+    )
+    
+    query = db.query(Product).filter(Product.is_active == True)
+    if category:
+        query = query.filter(Product.category == category)
+    response.headers["X-Total-Count"] = str(query.count())
+    
+    sort_column = {"revenue": revenue, "sales": sales_count, "price_change": price_change}.get(sort_by, Product.id)
+    if sort_by is None:
+        ordering = [Product.id]
+    elif order == "desc":
+        ordering = [sort_column.desc(), Product.id]
+    else:
+        ordering = [sort_column.asc(), Product.id]
+    
+    query = query.outerjoin(sales, sales.c.product_id == Product.id).with_entities(
+        Product.id,
+        Product.name,
+        Product.category,
+        Product.base_price,
+        Product.current_price,
+        Product.stock_quantity,
+        sales_count.label('sales_count'),
+        revenue.label('revenue'),
+        price_change.label('price_change')
+    ).order_by(*ordering).offset(skip)
+    # The dashboard fetches the whole table; API clients page with skip/limit
+    if limit is not None:
+        query = query.limit(limit)
+    rows = query.all()
+    
+    return [
+        {
+            "id": row.id,
+            "name": row.name or '',
+            "category": row.category or '',
+            "base_price": float(row.base_price or 0),
+            "current_price": float(row.current_price or 0),
+            "price_change": round(float(row.price_change or 0), 2),
+            "sales_count": row.sales_count,
+            "revenue": float(row.revenue or 0),
+            "stock_quantity": row.stock_quantity or 0
+        }
+        for row in rows
+    ]
 
 @router.get("/orders")
 async def get_order_analytics(
@@ -188,9 +234,11 @@ async def get_order_analytics(
     
     # Orders by status
     orders_by_status = db.query(
-        Order.status,
-        func.count(Order.id).label('count')
-    ).group_by(Order.status).all()
+        DailyRevenueRollup.status,
+        func.sum(DailyRevenueRollup.order_count).label('count')
+    ).group_by(DailyRevenueRollup.status).having(
+        func.sum(DailyRevenueRollup.order_count) > 0
+    ).all()
     
     # Recent orders
     recent_orders = db.query(Order).order_by(
@@ -214,23 +262,72 @@ async def get_order_analytics(
         ]
     }
 
+@router.get("/inference-metrics")
+async def get_inference_metrics(
+    current_user: User = Depends(get_current_user)
+):
+    """Get pricing micro-batch histograms and prediction cache hit/miss counters"""
+    if current_user.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    prediction_cache = get_shared_prediction_cache()
+    return {
+        **metrics.snapshot("pricing_"),
+        "prediction_cache": prediction_cache.stats() if prediction_cache else None
+    }
+
+@router.get("/scraper-metrics")
+async def get_scraper_metrics(
+    current_user: User = Depends(get_current_user)
+):
+    """Get per-competitor scraper counters and latency, plus the last catalog refresh run"""
+    if current_user.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    checkpoint = load_checkpoint() or {}
+    last_run = {key: value for key, value in checkpoint.items() if key not in ('queue', 'done', 'failed')}
+    if checkpoint:
+        last_run['progress'] = {
+            "done": len(checkpoint.get('done', [])),
+            "total": len(checkpoint.get('queue', [])),
+            "failed": len(checkpoint.get('failed', []))
+        }
+    return {
+        **metrics.snapshot("scraper_"),
+        "catalog_refresh": last_run or None
+    }
+
 @router.post("/retrain-model")
 async def retrain_model(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Trigger ML model retraining"""
+    """Queue ML model retraining in the background worker pool"""
     if current_user.role.value != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     try:
-        trainer = ModelTrainer()
-        # This will run the training pipeline and return model, metrics
-        model, metrics = trainer.train()
+        job_id = submit_training_job()
         return {
-            "message": "Model retraining completed successfully!",
-            "metrics": metrics
+            "message": "Model retraining started",
+            "job_id": job_id,
+            "status": "queued"
         }
     except Exception as e:
         return {
             "message": f"Model retraining failed: {str(e)}"
-        } 
\ No newline at end of file
+        }
+
+@router.get("/retrain-model/{job_id}")
+async def get_retrain_status(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get progress, epoch losses, final metrics and the resulting model version of a retraining job"""
+    if current_user.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    job = get_training_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    job.pop('traceback', None)
+    return job
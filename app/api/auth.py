@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import NamedTuple, Optional
+import os
 import jwt
 from passlib.context import CryptContext
 
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.cache import make_cache
 from app.models.user import User, UserRole
 from app.schemas.auth import UserCreate, UserLogin, Token, UserResponse
 
@@ -15,6 +18,17 @@ router = APIRouter()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Resolved users keyed by token subject (username). The memory backend is per process, so
+# invalidation only reaches the worker that made the change; other workers keep a demoted or
+# disabled user's old role for up to USER_CACHE_TTL_SECONDS. Use the redis backend with several workers.
+_user_cache = make_cache(
+    "auth_user", settings.USER_CACHE_BACKEND, settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS
+)
+if settings.USER_CACHE_BACKEND == "memory" and int(os.environ.get("WEB_CONCURRENCY", "1")) > 1:
+    print("Warning: USER_CACHE_BACKEND=memory with several workers; role and status changes "
+          "reach other workers only after USER_CACHE_TTL_SECONDS. Set USER_CACHE_BACKEND=redis.")
+_STALE_USERS_KEY = "_stale_cached_users"
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -31,7 +45,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+class CurrentUser(NamedTuple):
+    """Read-only view of the authenticated user; not an ORM object, so it cannot be added to a session"""
+    id: int
+    email: str
+    username: str
+    full_name: Optional[str]
+    is_active: bool
+    role: Optional[UserRole]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -44,10 +69,68 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    
+    # Most requests are answered from the cache without touching the database
+    snapshot = _user_cache.get(username)
+    if snapshot is None:
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            raise credentials_exception
+        snapshot = _user_snapshot(user)
+        _user_cache.set(username, snapshot)
+    # Same type either way, so handlers never come to rely on ORM behaviour only a cache miss gives
+    return _user_from_snapshot(snapshot)
+
+def _user_snapshot(user: User) -> dict:
+    """JSON-safe copy of the columns request handlers read; never the password hash"""
+    return {
+        "id": user.id,
+        "email": user.email,
+        "username": user.username,
+        "full_name": user.full_name,
+        "is_active": user.is_active,
+        "role": user.role.value if user.role else None,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "updated_at": user.updated_at.isoformat() if user.updated_at else None
+    }
+
+def _user_from_snapshot(snapshot: dict) -> CurrentUser:
+    """Principal rebuilt from a snapshot; load the User row for writes or relationships"""
+    return CurrentUser(
+        id=snapshot["id"],
+        email=snapshot["email"],
+        username=snapshot["username"],
+        full_name=snapshot["full_name"],
+        is_active=snapshot["is_active"],
+        role=UserRole(snapshot["role"]) if snapshot["role"] else None,
+        created_at=datetime.fromisoformat(snapshot["created_at"]) if snapshot["created_at"] else None,
+        updated_at=datetime.fromisoformat(snapshot["updated_at"]) if snapshot["updated_at"] else None
+    )
+
+def invalidate_cached_user(username: str):
+    _user_cache.delete(username)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_on_write(mapper, connection, target):
+    # Covers status toggles, role changes and renames from any code path using the ORM
+    usernames = {target.username, *inspect(target).attrs.username.history.deleted}
+    for name in usernames:
+        invalidate_cached_user(name)
+    
+    # Invalidate again once committed, in case a concurrent request re-cached the old row
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_STALE_USERS_KEY, set()).update(usernames)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_users_after_commit(session):
+    for name in session.info.pop(_STALE_USERS_KEY, ()):
+        invalidate_cached_user(name)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stale_users(session):
+    session.info.pop(_STALE_USERS_KEY, None)
 
 @router.post("/register", response_model=UserResponse)
 def register(user_data: UserCreate, db: Session = Depends(get_db)):
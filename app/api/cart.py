@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from typing import List
 from pydantic import BaseModel
 
@@ -27,24 +28,31 @@ class CartItemResponse(BaseModel):
 @router.get("/", response_model=List[CartItemResponse])
 def get_cart(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get user's cart items"""
-    cart_items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
+    # One joined query for the whole cart; items whose product no longer exists drop out
+    rows = db.query(
+        CartItem.id,
+        CartItem.product_id,
+        CartItem.quantity,
+        Product.name,
+        Product.current_price
+    ).join(Product, Product.id == CartItem.product_id).filter(
+        CartItem.user_id == current_user.id
+    ).order_by(CartItem.id).all()
     
     response_items = []
-    for item in cart_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product:
-            current_price = getattr(product, 'current_price', 0.0)
-            item_total = current_price * getattr(item, 'quantity', 0)
-            response_items.append(CartItemResponse(
-                id=getattr(item, 'id', 0),
-                product_id=getattr(item, 'product_id', 0),
-                product_name=getattr(product, 'name', ''),
-                product_price=current_price,
-                price=current_price,  # Alias for JavaScript compatibility
-                quantity=getattr(item, 'quantity', 0),
-                total_price=item_total,
-                price_at_time=current_price
-            ))
+    for row in rows:
+        current_price = row.current_price or 0.0
+        quantity = row.quantity or 0
+        response_items.append(CartItemResponse(
+            id=row.id,
+            product_id=row.product_id,
+            product_name=row.name or '',
+            product_price=current_price,
+            price=current_price,  # Alias for JavaScript compatibility
+            quantity=quantity,
+            total_price=current_price * quantity,
+            price_at_time=current_price
+        ))
     
     return response_items
 
@@ -156,15 +164,13 @@ def clear_cart(current_user: User = Depends(get_current_user), db: Session = Dep
 @router.get("/total")
 def get_cart_total(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get cart total"""
-    cart_items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
-    
-    total = 0.0
-    for item in cart_items:
-        product = db.query(Product).filter(Product.id == getattr(item, 'product_id', 0)).first()
-        if product:
-            total += getattr(product, 'current_price', 0.0) * getattr(item, 'quantity', 0)
+    total = db.query(
+        func.coalesce(func.sum(Product.current_price * CartItem.quantity), 0.0)
+    ).select_from(CartItem).join(Product, Product.id == CartItem.product_id).filter(
+        CartItem.user_id == current_user.id
+    ).scalar()
     
-    return {"total": total}
+    return {"total": float(total or 0.0)}
 
 # Keep the old endpoints for backward compatibility
 @router.put("/update/{item_id}")
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import update
 from typing import List, Optional, Union
 from pydantic import BaseModel
 from datetime import datetime
-import requests
 import json
 
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.paystack import PaystackError, get_paystack_client
+from app.core.pagination import encode_cursor, decode_cursor, after_row
 from app.models.user import User
 from app.models.order import Order, OrderItem, OrderStatus, CartItem
 from app.models.product import Product
@@ -80,19 +82,38 @@ async def create_order(
     if not validate_paystack_payment_info(order_data.payment_info):
         raise HTTPException(status_code=400, detail="Invalid payment information")
     
+    # Load every product in the cart with one query
+    quantities = {}
+    for cart_item in cart_items:
+        product_id = getattr(cart_item, 'product_id', 0)
+        quantities[product_id] = quantities.get(product_id, 0) + (getattr(cart_item, 'quantity', 0) or 0)
+    
+    products = {
+        product.id: product
+        for product in db.query(Product).filter(Product.id.in_(list(quantities))).all()
+    }
+    
     # Calculate total amount
     total_amount = 0.0
     order_items = []
     
-    for cart_item in cart_items:
-        product = db.query(Product).filter(Product.id == getattr(cart_item, 'product_id', 0)).first()
+    # Lock rows in product id order so concurrent checkouts of the same products
+    # always take their row locks in the same order and cannot deadlock
+    for product_id, cart_quantity in sorted(quantities.items()):
+        product = products.get(product_id)
         if not product:
-            raise HTTPException(status_code=404, detail=f"Product {getattr(cart_item, 'product_id', 0)} not found")
+            raise HTTPException(status_code=404, detail=f"Product {product_id} not found")
         
-        # Check stock using the actual values
-        stock_quantity = getattr(product, 'stock_quantity', 0) or 0
-        cart_quantity = getattr(cart_item, 'quantity', 0) or 0
-        if stock_quantity < cart_quantity:
+        # Reserve stock atomically: the WHERE clause only matches while enough stock is left,
+        # so concurrent checkouts can never take the quantity below zero
+        result = db.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.stock_quantity >= cart_quantity)
+            .values(stock_quantity=Product.stock_quantity - cart_quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            db.rollback()
             raise HTTPException(
                 status_code=400, 
                 detail=f"Insufficient stock for {getattr(product, 'name', 'Unknown Product')}"
@@ -104,15 +125,11 @@ async def create_order(
         
         # Create order item
         order_item = OrderItem(
-            product_id=getattr(cart_item, 'product_id', 0),
+            product_id=product_id,
             quantity=cart_quantity,
             price_at_time=current_price
         )
         order_items.append(order_item)
-        
-        # Update stock - use setattr to avoid SQLAlchemy issues
-        new_stock = stock_quantity - cart_quantity
-        setattr(product, 'stock_quantity', new_stock)
     
     # Add shipping cost (free over GHS 1000, otherwise GHS 50)
     shipping_cost = 0 if total_amount > 1000.0 else 50.0
@@ -155,6 +172,7 @@ async def create_order(
     for cart_item in cart_items:
         db.delete(cart_item)
     
+    # Stock reservations, the order and the cleared cart commit together
     db.commit()
     db.refresh(order)
     
@@ -163,7 +181,7 @@ async def create_order(
     
     # Process Paystack payment
     try:
-        payment_result = process_paystack_payment(order_data.payment_info, order)
+        payment_result = await process_paystack_payment(order_data.payment_info, order)
         return payment_result
     except Exception as e:
         print(f"Payment processing error for order {order.id}: {str(e)}")
@@ -181,15 +199,9 @@ def validate_paystack_payment_info(payment_info: PaystackPayment) -> bool:
     except:
         return False
 
-def process_paystack_payment(payment_info: PaystackPayment, order: Order):
+async def process_paystack_payment(payment_info: PaystackPayment, order: Order):
     """Process payment using Paystack API"""
     try:
-        # Initialize Paystack transaction
-        headers = {
-            "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-            "Content-Type": "application/json"
-        }
-        
         # Convert amount to kobo (Paystack uses kobo for amounts)
         amount_in_kobo = int(payment_info.amount * 100)
         
@@ -207,11 +219,7 @@ def process_paystack_payment(payment_info: PaystackPayment, order: Order):
         }
         
         # Make API call to Paystack
-        response = requests.post(
-            f"{settings.PAYSTACK_BASE_URL}/transaction/initialize",
-            headers=headers,
-            json=payload
-        )
+        response = await get_paystack_client().initialize_transaction(payload)
         
         if response.status_code == 200:
             result = response.json()
@@ -236,6 +244,9 @@ def process_paystack_payment(payment_info: PaystackPayment, order: Order):
         else:
             raise HTTPException(status_code=400, detail=f"Paystack API error: {response.text}")
             
+    except PaystackError as e:
+        print(f"Paystack unavailable: {str(e)}")
+        raise HTTPException(status_code=503, detail="Payment provider unavailable")
     except Exception as e:
         print(f"Paystack payment error: {str(e)}")
         raise HTTPException(status_code=500, detail="Payment processing failed")
@@ -248,15 +259,7 @@ async def verify_payment(
 ):
     """Verify Paystack payment status"""
     try:
-        headers = {
-            "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        response = requests.get(
-            f"{settings.PAYSTACK_BASE_URL}/transaction/verify/{reference}",
-            headers=headers
-        )
+        response = await get_paystack_client().verify_transaction(reference)
         
         if response.status_code == 200:
             result = response.json()
@@ -286,6 +289,8 @@ async def verify_payment(
         else:
             raise HTTPException(status_code=400, detail="Payment verification failed")
             
+    except PaystackError as e:
+        raise HTTPException(status_code=503, detail=f"Payment provider unavailable: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Payment verification error: {str(e)}")
 
@@ -305,7 +310,9 @@ async def get_order(
     db: Session = Depends(get_db)
 ):
     """Get specific order details with items"""
-    order = db.query(Order).filter(
+    order = db.query(Order).options(
+        selectinload(Order.order_items).joinedload(OrderItem.product)
+    ).filter(
         Order.id == order_id,
         Order.user_id == current_user.id
     ).first()
@@ -313,34 +320,7 @@ async def get_order(
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    # Get order items
-    order_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
-    
-    # Get product details for each item
-    items_data = []
-    for item in order_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        items_data.append({
-            "product_name": product.name if product else "Unknown Product",
-            "quantity": item.quantity,
-            "price_at_time": item.price_at_time,
-            "total": item.quantity * item.price_at_time
-        })
-    
-    # Create response with items
-    response_data = {
-        "id": order.id,
-        "total_amount": order.total_amount,
-        "status": order.status.value,
-        "shipping_address": order.shipping_address,
-        "created_at": order.created_at,
-        "customer_name": order.customer_name,
-        "customer_email": order.customer_email,
-        "order_notes": order.order_notes,
-        "items": items_data
-    }
-    
-    return response_data
+    return _order_detail(order)
 
 @router.put("/{order_id}/status")
 async def update_order_status(
@@ -366,51 +346,65 @@ async def update_order_status(
 
 @router.get("/admin/all", response_model=List[OrderDetailResponse])
 async def get_all_orders(
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     status: Optional[OrderStatus] = None,
-    limit: int = 50,
-    offset: int = 0
+    limit: int = Query(50, ge=0),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None
 ):
-    """Get all orders (Admin only) with filtering and pagination"""
+    """Get all orders (Admin only) with filtering and keyset pagination"""
     if current_user.role.value != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    query = db.query(Order)
+    # Items and their products arrive in one extra query for the whole page
+    query = db.query(Order).options(
+        selectinload(Order.order_items).joinedload(OrderItem.product)
+    )
     
     if status:
         query = query.filter(Order.status == status)
     
-    orders = query.order_by(Order.created_at.desc()).offset(offset).limit(limit).all()
+    # Pass a page's X-Next-Cursor header back as cursor; offset only applies without one
+    query = query.order_by(Order.created_at.desc(), Order.id.desc())
+    if cursor:
+        try:
+            last_id = int(decode_cursor(cursor)["id"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(after_row(Order, Order.created_at, last_id))
+    else:
+        query = query.offset(offset)
     
-    # Get detailed order information
-    detailed_orders = []
-    for order in orders:
-        order_items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-        
-        items_data = []
-        for item in order_items:
-            product = db.query(Product).filter(Product.id == item.product_id).first()
-            items_data.append({
-                "product_name": product.name if product else "Unknown Product",
-                "quantity": item.quantity,
-                "price_at_time": item.price_at_time,
-                "total": item.quantity * item.price_at_time
-            })
-        
-        detailed_orders.append({
-            "id": order.id,
-            "total_amount": order.total_amount,
-            "status": order.status.value,
-            "shipping_address": order.shipping_address,
-            "created_at": order.created_at,
-            "customer_name": order.customer_name,
-            "customer_email": order.customer_email,
-            "order_notes": order.order_notes,
-            "items": items_data
+    orders = query.limit(limit).all()
+    if orders and len(orders) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor({"id": orders[-1].id})
+    
+    return [_order_detail(order) for order in orders]
+
+def _order_detail(order: Order) -> dict:
+    """Order detail payload built from eager-loaded items and products"""
+    items_data = []
+    for item in order.order_items:
+        items_data.append({
+            "product_name": item.product.name if item.product else "Unknown Product",
+            "quantity": item.quantity,
+            "price_at_time": item.price_at_time,
+            "total": item.quantity * item.price_at_time
         })
     
-    return detailed_orders
+    return {
+        "id": order.id,
+        "total_amount": order.total_amount,
+        "status": order.status.value,
+        "shipping_address": order.shipping_address,
+        "created_at": order.created_at,
+        "customer_name": order.customer_name,
+        "customer_email": order.customer_email,
+        "order_notes": order.order_notes,
+        "items": items_data
+    }
 
 def log_order_analytics(order: Order, db: Session):
     """Log order data for analytics and AI model training"""
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
@@ -9,29 +9,103 @@ from app.models.product import Product, PriceHistory, CompetitorPrice
 # from app.models.analytics import DemandMetrics  # Commented out since DemandMetrics is disabled
 from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, PriceHistoryResponse
 from app.api.auth import get_current_user
+from app.core.pagination import encode_cursor, decode_cursor, after_row
+from app.core import search as product_search
 from app.ml.dynamic_pricing_model import DynamicPricingEngine
+from app.ml.batching import PredictionBatcher
 from app.scrapers.competitor_scraper import CompetitorPriceScraper
+from app.scrapers.price_refresh import CompetitorPriceRefresher, latest_competitor_prices, refresh_age_seconds, is_stale
 
 router = APIRouter()
 pricing_engine = DynamicPricingEngine()
+pricing_batcher = PredictionBatcher(pricing_engine)
 scraper = CompetitorPriceScraper()
+price_refresher = CompetitorPriceRefresher(scraper)
+
+# sort option -> (column, descending); ties are always broken by id in the same direction
+PRODUCT_SORTS = {
+    "id": (Product.id, False),
+    "price_asc": (Product.current_price, False),
+    "price_desc": (Product.current_price, True),
+    "newest": (Product.created_at, True)
+}
 
 @router.get("/", response_model=List[ProductResponse])
 def get_products(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     category: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: Optional[bool] = None,
+    sort: str = "id",
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all products with optional filtering"""
+    """Get all products with optional filtering, sorting and cursor pagination"""
+    if sort not in PRODUCT_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(PRODUCT_SORTS)}")
+    
     query = db.query(Product).filter(Product.is_active == True)
     
     if category:
         query = query.filter(Product.category == category)
+    if min_price is not None:
+        query = query.filter(Product.current_price >= min_price)
+    if max_price is not None:
+        query = query.filter(Product.current_price <= max_price)
+    if in_stock is True:
+        query = query.filter(Product.stock_quantity > 0)
+    elif in_stock is False:
+        query = query.filter(Product.stock_quantity <= 0)
+    
+    sort_column, descending = PRODUCT_SORTS[sort]
+    if sort_column is Product.current_price:
+        # A NULL price (rows from before the column was required) has no place in a
+        # price ordering and would put a null boundary in the cursor, so leave them out
+        query = query.filter(Product.current_price.isnot(None))
+    ordering = [sort_column, Product.id] if sort_column is not Product.id else [Product.id]
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in ordering])
+    
+    if cursor:
+        # Keyset pagination: constant cost per page however deep the crawl goes
+        try:
+            position = decode_cursor(cursor)
+            if position.get("sort") != sort:
+                raise ValueError("Cursor was issued for a different sort")
+            last_id = int(position["id"])
+            last_price = position.get("price")
+            if sort_column is Product.current_price and not isinstance(last_price, (int, float)):
+                raise ValueError("Price cursor without a boundary price")
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(after_row(Product, sort_column, last_id, descending, last_value=last_price))
+    else:
+        query = query.offset(skip)
     
-    products = query.offset(skip).limit(limit).all()
+    products = query.limit(limit).all()
+    
+    if len(products) == limit:
+        last = products[-1]
+        position = {"sort": sort, "id": last.id}
+        if sort_column is Product.current_price:
+            # Keep the boundary price so repricing between pages can't shift rows across it
+            position["price"] = last.current_price
+        response.headers["X-Next-Cursor"] = encode_cursor(position)
     return products
 
+@router.get("/search", response_model=List[ProductResponse])
+def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    category: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Full-text search over product name, description and category, best match first"""
+    return product_search.search_products(db, q, limit=limit, offset=skip, category=category)
+
 @router.get("/{product_id}", response_model=ProductResponse)
 def get_product(product_id: int, db: Session = Depends(get_db)):
     """Get a specific product by ID"""
@@ -100,6 +174,7 @@ def delete_product(
 @router.post("/{product_id}/update-price")
 def update_product_price(
     product_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -111,8 +186,11 @@ def update_product_price(
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    # Get competitor prices
-    competitor_prices = scraper.get_competitor_prices(str(product.name), str(product.category))
+    # Use the latest stored competitor prices; stale ones are refreshed after the response,
+    # unless a recent scrape already came back empty or failed
+    competitor_prices, competitor_prices_age = latest_competitor_prices(db, product_id)
+    if is_stale(refresh_age_seconds(db, product_id, competitor_prices_age)) and price_refresher.claim(product_id):
+        background_tasks.add_task(price_refresher.refresh, product_id)
     
     # Calculate average competitor price
     if competitor_prices:
@@ -141,8 +219,8 @@ def update_product_price(
         'time_since_last_price_change': 1.0  # Simplified
     }
     
-    # Predict optimal price
-    optimal_price = pricing_engine.predict_optimal_price(product_data)
+    # Predict optimal price (batched with any concurrent requests)
+    optimal_price = pricing_batcher.predict_from_thread(product_data)
     
     # Update product price
     old_price = product.current_price
@@ -155,16 +233,6 @@ def update_product_price(
         reason="ai_dynamic_pricing"
     )
     
-    # Save competitor prices
-    for cp in competitor_prices:
-        competitor_price = CompetitorPrice(
-            product_id=product_id,
-            competitor_name=cp['competitor'],
-            price=cp['price'],
-            url=cp.get('url')
-        )
-        db.add(competitor_price)
-    
     db.add(price_history)
     db.commit()
     
@@ -172,7 +240,9 @@ def update_product_price(
         "message": "Price updated successfully",
         "old_price": old_price,
         "new_price": optimal_price,
-        "competitor_prices": competitor_prices
+        "competitor_prices": competitor_prices,
+        "competitor_prices_age_seconds": competitor_prices_age,
+        "competitor_refresh_pending": price_refresher.is_refreshing(product_id)
     }
 
 @router.get("/{product_id}/price-history", response_model=List[PriceHistoryResponse])
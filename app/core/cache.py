@@ -0,0 +1,111 @@
+"""
+Key/Value TTL Caches
+In-process LRU cache with per-entry expiry, and a Redis-backed variant with the
+same interface for sharing entries (and invalidations) across worker processes
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.core.config import settings
+
+class TTLCache:
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"backend": "memory", "size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+class RedisTTLCache:
+    """JSON values in Redis under namespace:key; any Redis error behaves as a miss"""
+
+    def __init__(self, namespace: str, ttl_seconds: float, url: Optional[str] = None):
+        import redis
+
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.client = redis.Redis.from_url(url or settings.REDIS_URL, socket_timeout=0.25)
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = self.client.get(self._key(key))
+        except Exception as e:
+            print(f"Cache read failed for {key}: {e}")
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any):
+        try:
+            self.client.set(self._key(key), json.dumps(value), px=int(self.ttl_seconds * 1000))
+        except Exception as e:
+            print(f"Cache write failed for {key}: {e}")
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(self._key(key))
+        except Exception as e:
+            print(f"Cache delete failed for {key}: {e}")
+
+    def clear(self):
+        try:
+            for key in self.client.scan_iter(f"{self.namespace}:*"):
+                self.client.delete(key)
+        except Exception as e:
+            print(f"Cache clear failed for {self.namespace}: {e}")
+
+    def stats(self):
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+def make_cache(namespace: str, backend: str, max_size: int, ttl_seconds: float):
+    """Build a cache for backend 'memory' or 'redis'"""
+    if backend == "redis":
+        return RedisTTLCache(namespace, ttl_seconds)
+    return TTLCache(max_size, ttl_seconds)
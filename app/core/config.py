@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 import os
 
 class Settings(BaseSettings):
@@ -10,6 +10,9 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-here"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    USER_CACHE_BACKEND: str = "memory"  # memory (per process; use redis with several workers) or redis (shared, uses REDIS_URL)
+    USER_CACHE_TTL_SECONDS: float = 60.0  # Upper bound on staleness of users cached for auth
+    USER_CACHE_SIZE: int = 10000  # Users cached per process by the memory backend; 0 disables it
     
     # Firebase
     FIREBASE_CREDENTIALS_PATH: Optional[str] = None
@@ -24,19 +27,51 @@ class Settings(BaseSettings):
     PAYSTACK_PUBLIC_KEY: str = "pk_test_your_paystack_public_key_here"
     PAYSTACK_BASE_URL: str = "https://api.paystack.co"
     PAYSTACK_CURRENCY: str = "GHS"  # Ghanaian Cedi
+    PAYSTACK_TIMEOUT_SECONDS: float = 10.0  # Per-request timeout for Paystack API calls
+    PAYSTACK_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    PAYSTACK_MAX_RETRIES: int = 3  # Retries for timeouts, connection errors, 429 and 5xx responses
+    PAYSTACK_RETRY_BACKOFF_SECONDS: float = 0.5  # Base delay, doubled per attempt with full jitter
+    PAYSTACK_MAX_CONNECTIONS: int = 20  # Pooled connections shared by all payment requests
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
     
     # ML Model
     MODEL_PATH: str = "app/ml/models/dynamic_pricing_model.pth"
+    MODEL_REGISTRY_DIR: str = "app/ml/models/registry"  # Versioned models plus the CURRENT pointer
+    MODEL_RELOAD_INTERVAL_SECONDS: float = 5.0  # How often engines check for a newly promoted version
+    INFERENCE_BACKEND: str = "auto"  # auto (NumPy when exported weights exist), numpy or torch
+    PRICING_BATCH_MAX_SIZE: int = 64  # Max predictions per micro-batched forward pass
+    PRICING_BATCH_MAX_WAIT_MS: float = 5.0  # Max time a request waits for its batch to fill
+    PRICING_BATCH_MAX_IN_FLIGHT: int = 2  # Batches predicted at once while the next one fills
+    PREDICTION_CACHE_SIZE: int = 200000  # Cached predictions per process; 0 disables the cache
+    PREDICTION_CACHE_TTL_SECONDS: float = 86400.0
+    PREDICTION_CACHE_DECIMALS: int = 2  # Features are rounded to this many places to form cache keys
+    REPRICING_CHUNK_SIZE: int = 1000  # Products per batch in the nightly repricing job
+    TRAINING_DATA_PATH: str = "data/amazon_processed_data.csv"  # CSV, Parquet or Feather
+    TRAINING_WORKERS: int = 1  # Processes in the background model training pool
+    TRAINING_JOBS_DIR: str = "app/ml/models/jobs"  # Status files for background training jobs
     
     # Web Scraping
-    SCRAPING_DELAY: int = 2
+    SCRAPING_DELAY: int = 2  # Average seconds between product scrapes (search + product pages) per competitor domain
+    SCRAPER_DOMAIN_BURST: int = 4  # Requests a domain may receive back to back before pacing kicks in
+    SCRAPER_DOMAIN_CONCURRENCY: int = 3  # In-flight requests per competitor domain
+    SCRAPER_GLOBAL_CONCURRENCY: int = 16  # In-flight scraper requests across all domains
+    SCRAPER_TIMEOUT_SECONDS: float = 10.0
+    SCRAPER_PARSER_BACKEND: str = "auto"  # auto (selectolax, then lxml, then bs4), selectolax, lxml or bs4
+    SCRAPER_HTTP_CACHE_DIR: str = "data/scraper_http_cache"  # Empty disables the scraper page cache
+    SCRAPER_HTTP_CACHE_TTL_SECONDS: float = 3600.0  # Cached pages are reused without a request for this long, then revalidated
+    SCRAPER_HTTP_CACHE_TTL_OVERRIDES: Dict[str, float] = {}  # Per-competitor TTLs, e.g. {"amazon": 900}
+    SCRAPER_HTTP_CACHE_RETENTION_SECONDS: float = 604800.0  # Entries not fetched or revalidated for this long are pruned
+    COMPETITOR_PRICE_MAX_AGE_SECONDS: float = 21600.0  # Stored competitor prices older than this trigger a background refresh
+    CATALOG_REFRESH_INTERVAL_HOURS: float = 6.0  # How often the scheduler refreshes stale competitor prices catalog-wide
+    CATALOG_REFRESH_CONCURRENCY: int = 8  # Products scraped at once during a catalog refresh
+    CATALOG_REFRESH_CHECKPOINT_PATH: str = "data/catalog_refresh_checkpoint.json"
+    CATALOG_REFRESH_CHECKPOINT_SECONDS: float = 15.0  # Minimum time between checkpoint writes
     USER_AGENT: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     
     class Config:
-        env_file = ".env"
+        env_file = os.environ.get("ENV_FILE", ".env")  # ENV_FILE lets tests and tools use another file
         extra = "ignore"  # Ignore extra fields in .env file
 
 settings = Settings() 
\ No newline at end of file
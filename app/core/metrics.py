@@ -0,0 +1,89 @@
+"""
+In-process metrics
+Minimal thread-safe counters and histograms exposed as JSON snapshots by the admin/analytics APIs
+"""
+
+import bisect
+import threading
+from typing import Dict, Sequence, Union
+
+class Histogram:
+    """Cumulative-bucket histogram in the same shape Prometheus uses"""
+    
+    def __init__(self, name: str, buckets: Sequence[float], description: str = ""):
+        self.name = name
+        self.description = description
+        self.bounds = sorted(buckets)
+        self._counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = list(self._counts)
+            count, total = self._count, self._sum
+        
+        buckets = {}
+        running = 0
+        for bound, bucket_count in zip(self.bounds + [float('inf')], counts):
+            running += bucket_count
+            buckets['+Inf' if bound == float('inf') else f"{bound:g}"] = running
+        return {
+            "description": self.description,
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "buckets": buckets
+        }
+
+class Counter:
+    """Monotonically increasing total"""
+    
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value = 0.0
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+    
+    @property
+    def value(self) -> float:
+        with self._lock:
+            return self._value
+    
+    def snapshot(self) -> Dict:
+        return {"description": self.description, "value": self.value}
+
+_metrics: Dict[str, Union[Histogram, Counter]] = {}
+_metrics_lock = threading.Lock()
+
+def histogram(name: str, buckets: Sequence[float], description: str = "") -> Histogram:
+    """Get or create a process-wide histogram"""
+    with _metrics_lock:
+        if name not in _metrics:
+            _metrics[name] = Histogram(name, buckets, description)
+        return _metrics[name]
+
+def counter(name: str, description: str = "") -> Counter:
+    """Get or create a process-wide counter"""
+    with _metrics_lock:
+        if name not in _metrics:
+            _metrics[name] = Counter(name, description)
+        return _metrics[name]
+
+def snapshot(prefix: str = "") -> Dict[str, Dict]:
+    """Snapshot every registered metric whose name starts with prefix"""
+    with _metrics_lock:
+        metrics = [metric for name, metric in _metrics.items() if name.startswith(prefix)]
+    return {metric.name: metric.snapshot() for metric in metrics}
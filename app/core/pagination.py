@@ -0,0 +1,43 @@
+"""
+Keyset Pagination Helpers
+Opaque cursors that identify the last row of a page, and the WHERE clause that
+resumes a (sort column, id) ordering right after that row
+"""
+
+import base64
+import json
+from typing import Dict
+
+from sqlalchemy import and_, or_, select
+
+def encode_cursor(values: Dict) -> str:
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Dict:
+    """Decode a cursor from encode_cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, dict):
+        raise ValueError("Invalid cursor")
+    return values
+
+def after_row(model, sort_column, last_id: int, descending: bool = True, last_value=None):
+    """Rows that come after row last_id when ordered by (sort_column, id)
+
+    Without last_value the anchor's sort value is read back with a scalar subquery
+    rather than round-tripped through the cursor, so the comparison happens entirely
+    in the database and stays exact for timestamps. Pass last_value for columns that
+    can change between pages (like prices) to keep page boundaries where they were.
+    """
+    if sort_column is model.id:
+        return model.id < last_id if descending else model.id > last_id
+    anchor = last_value if last_value is not None else (
+        select(sort_column).where(model.id == last_id).scalar_subquery()
+    )
+    if descending:
+        return or_(sort_column < anchor, and_(sort_column == anchor, model.id < last_id))
+    return or_(sort_column > anchor, and_(sort_column == anchor, model.id > last_id))
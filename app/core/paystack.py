@@ -0,0 +1,115 @@
+"""
+Paystack API Client
+Async client sharing one pooled connection to Paystack, with timeouts and
+retries (exponential backoff plus jitter) so payment calls never block the event loop
+"""
+
+import asyncio
+import random
+from typing import Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+# Transient responses worth retrying; anything else is returned to the caller as-is
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Failures that mean Paystack never received the request; the only ones safe to retry for a POST
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+UNPROCESSED_STATUS_CODES = {429}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+class PaystackError(Exception):
+    """Raised when Paystack cannot be reached or keeps failing after all retries"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class PaystackClient:
+    def __init__(self, base_url: Optional[str] = None, secret_key: Optional[str] = None,
+                 timeout: Optional[float] = None, max_retries: Optional[int] = None,
+                 backoff_seconds: Optional[float] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = (base_url or settings.PAYSTACK_BASE_URL).rstrip('/')
+        self.secret_key = secret_key or settings.PAYSTACK_SECRET_KEY
+        self.timeout = timeout if timeout is not None else settings.PAYSTACK_TIMEOUT_SECONDS
+        self.max_retries = max_retries if max_retries is not None else settings.PAYSTACK_MAX_RETRIES
+        self.backoff_seconds = (
+            backoff_seconds if backoff_seconds is not None else settings.PAYSTACK_RETRY_BACKOFF_SECONDS
+        )
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled client, created on first use inside the running event loop"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    "Authorization": f"Bearer {self.secret_key}",
+                    "Content-Type": "application/json"
+                },
+                timeout=httpx.Timeout(self.timeout, connect=settings.PAYSTACK_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=settings.PAYSTACK_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.PAYSTACK_MAX_CONNECTIONS
+                ),
+                transport=self.transport
+            )
+        return self._client
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter keeps retrying workers from hitting Paystack in lockstep
+        return random.uniform(0, self.backoff_seconds * (2 ** attempt))
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send a request, retrying timeouts, connection errors, 429 and 5xx responses
+
+        Non-idempotent requests are only retried when Paystack cannot have acted on
+        them (connection failures and 429), since a retried POST that already
+        succeeded is rejected as a duplicate.
+        """
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        retry_errors = httpx.TransportError if idempotent else UNSENT_ERRORS
+        retry_statuses = RETRY_STATUS_CODES if idempotent else UNPROCESSED_STATUS_CODES
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self.client.request(method, path, **kwargs)
+            except retry_errors as e:
+                if attempt == self.max_retries:
+                    raise PaystackError(f"Paystack unreachable: {e}") from e
+            except httpx.TransportError as e:
+                raise PaystackError(f"Paystack request failed, it may still have been processed: {e}") from e
+            else:
+                if response.status_code not in retry_statuses or attempt == self.max_retries:
+                    return response
+            await asyncio.sleep(self._backoff(attempt))
+        raise PaystackError("Paystack request failed")
+
+    async def initialize_transaction(self, payload: Dict) -> httpx.Response:
+        return await self.request("POST", "/transaction/initialize", json=payload)
+
+    async def verify_transaction(self, reference: str) -> httpx.Response:
+        return await self.request("GET", f"/transaction/verify/{reference}")
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+_paystack_client: Optional[PaystackClient] = None
+
+def get_paystack_client() -> PaystackClient:
+    """Process-wide client so every payment request reuses the same connection pool"""
+    global _paystack_client
+    if _paystack_client is None:
+        _paystack_client = PaystackClient()
+    return _paystack_client
+
+async def close_paystack_client():
+    global _paystack_client
+    if _paystack_client is not None:
+        await _paystack_client.aclose()
+        _paystack_client = None
@@ -0,0 +1,75 @@
+"""
+Local Paystack Stub
+Minimal stand-in for the Paystack transaction API. Run it with
+`python -m app.core.paystack_stub` and set PAYSTACK_BASE_URL=http://127.0.0.1:8001,
+or mount it in-process with PaystackClient(transport=httpx.ASGITransport(app=stub_app))
+"""
+
+import asyncio
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+stub_app = FastAPI(title="Paystack Stub")
+
+# reference -> transaction; also lets tests inspect what was initialized
+transactions = {}
+
+# Knobs for exercising timeouts and retries
+stub_app.state.latency_seconds = 0.0
+stub_app.state.fail_next = 0  # Number of upcoming requests answered with a 503
+
+async def _simulate_conditions():
+    if stub_app.state.latency_seconds:
+        await asyncio.sleep(stub_app.state.latency_seconds)
+    if stub_app.state.fail_next > 0:
+        stub_app.state.fail_next -= 1
+        return JSONResponse({"status": False, "message": "Service unavailable"}, status_code=503)
+    return None
+
+@stub_app.post("/transaction/initialize")
+async def initialize_transaction(request: Request):
+    failure = await _simulate_conditions()
+    if failure:
+        return failure
+
+    payload = await request.json()
+    reference = payload.get("reference") or uuid.uuid4().hex
+    if reference in transactions:
+        return JSONResponse({"status": False, "message": "Duplicate Transaction Reference"}, status_code=400)
+
+    transactions[reference] = {**payload, "reference": reference, "status": "success"}
+    return {
+        "status": True,
+        "message": "Authorization URL created",
+        "data": {
+            "authorization_url": f"https://checkout.paystack.com/{reference}",
+            "access_code": uuid.uuid4().hex[:12],
+            "reference": reference
+        }
+    }
+
+@stub_app.get("/transaction/verify/{reference}")
+async def verify_transaction(reference: str):
+    failure = await _simulate_conditions()
+    if failure:
+        return failure
+
+    transaction = transactions.get(reference)
+    if transaction is None:
+        return JSONResponse({"status": False, "message": "Transaction reference not found"}, status_code=400)
+    return {
+        "status": True,
+        "message": "Verification successful",
+        "data": {
+            "reference": reference,
+            "status": transaction["status"],
+            "amount": transaction.get("amount"),
+            "currency": transaction.get("currency")
+        }
+    }
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(stub_app, host="127.0.0.1", port=8001)
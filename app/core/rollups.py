@@ -0,0 +1,229 @@
+"""
+Analytics Rollups
+Keeps the daily rollup tables in step with orders, order items and price history.
+Deltas are collected from each flush and applied as upserts inside the same
+transaction, so a rolled-back checkout never leaves the rollups behind.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, func, insert
+from sqlalchemy.orm import Session
+
+from app.models.analytics import DailyRevenueRollup, DailyProductSalesRollup, DailyPriceChangeRollup
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import PriceHistory
+
+_DELTAS_KEY = "_rollup_deltas"
+
+def _day(created_at: Optional[datetime]) -> date:
+    # Days are UTC dates: new rows get created_at from the database clock (UTC) after the
+    # flush, and the analytics endpoints build their buckets from utcnow() to match
+    return (created_at or datetime.utcnow()).date()
+
+def _status(status) -> str:
+    if status is None:
+        return OrderStatus.PENDING.value
+    return status.value if isinstance(status, OrderStatus) else OrderStatus[status].value
+
+class RollupDeltas:
+    def __init__(self):
+        self.revenue: Dict[Tuple, list] = defaultdict(lambda: [0, 0.0])
+        self.product_sales: Dict[Tuple, list] = defaultdict(lambda: [0, 0, 0.0])
+        self.price_changes: Dict[Tuple, int] = defaultdict(int)
+
+    def order(self, day: date, status: str, total_amount, sign: int):
+        entry = self.revenue[(day, status)]
+        entry[0] += sign
+        entry[1] += sign * (total_amount or 0.0)
+
+    def order_item(self, day: date, status: str, product_id: int, quantity, price, sign: int):
+        entry = self.product_sales[(day, product_id, status)]
+        entry[0] += sign
+        entry[1] += sign * (quantity or 0)
+        entry[2] += sign * (quantity or 0) * (price or 0.0)
+
+    def price_change(self, day: date, reason: Optional[str], sign: int):
+        self.price_changes[(day, reason or '')] += sign
+
+def _persisted_order(session: Session, order_id: int):
+    """(created_at, status, total_amount) as currently stored, before this flush"""
+    return session.query(Order.created_at, Order.status, Order.total_amount).filter(
+        Order.id == order_id
+    ).first()
+
+def _collect(session: Session, deltas: RollupDeltas):
+    for obj in session.new:
+        if isinstance(obj, Order):
+            deltas.order(_day(obj.created_at), _status(obj.status), obj.total_amount, 1)
+        elif isinstance(obj, OrderItem):
+            order = obj.order or (session.get(Order, obj.order_id) if obj.order_id else None)
+            if order is not None:
+                deltas.order_item(_day(order.created_at), _status(order.status),
+                                  obj.product_id, obj.quantity, obj.price_at_time, 1)
+        elif isinstance(obj, PriceHistory):
+            deltas.price_change(_day(obj.created_at), obj.reason, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Order):
+            stored = _persisted_order(session, obj.id)
+            if stored:
+                deltas.order(_day(stored.created_at), _status(stored.status), stored.total_amount, -1)
+        elif isinstance(obj, OrderItem):
+            stored = session.query(
+                OrderItem.product_id, OrderItem.quantity, OrderItem.price_at_time, Order.created_at, Order.status
+            ).join(Order).filter(OrderItem.id == obj.id).first()
+            if stored:
+                deltas.order_item(_day(stored.created_at), _status(stored.status),
+                                  stored.product_id, stored.quantity, stored.price_at_time, -1)
+        elif isinstance(obj, PriceHistory):
+            deltas.price_change(_day(obj.created_at), obj.reason, -1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Order) and session.is_modified(obj):
+            stored = _persisted_order(session, obj.id)
+            if not stored:
+                continue
+            old_key = (_day(stored.created_at), _status(stored.status))
+            new_key = (_day(obj.created_at or stored.created_at), _status(obj.status))
+            if old_key == new_key and stored.total_amount == obj.total_amount:
+                continue
+            deltas.order(*old_key, stored.total_amount, -1)
+            deltas.order(*new_key, obj.total_amount, 1)
+            if old_key != new_key:
+                # The order's existing lines move to the new day/status too
+                items = session.query(
+                    OrderItem.product_id, OrderItem.quantity, OrderItem.price_at_time
+                ).filter(OrderItem.order_id == obj.id).all()
+                for item in items:
+                    deltas.order_item(*old_key, item.product_id, item.quantity, item.price_at_time, -1)
+                    deltas.order_item(*new_key, item.product_id, item.quantity, item.price_at_time, 1)
+        elif isinstance(obj, OrderItem) and session.is_modified(obj):
+            stored = session.query(
+                OrderItem.product_id, OrderItem.quantity, OrderItem.price_at_time, Order.created_at, Order.status
+            ).join(Order).filter(OrderItem.id == obj.id).first()
+            if not stored:
+                continue
+            order = obj.order or session.get(Order, obj.order_id)
+            deltas.order_item(_day(stored.created_at), _status(stored.status),
+                              stored.product_id, stored.quantity, stored.price_at_time, -1)
+            deltas.order_item(_day(order.created_at), _status(order.status),
+                              obj.product_id, obj.quantity, obj.price_at_time, 1)
+
+def _upsert(connection, model, keys: Dict, increments: Dict):
+    """Add increments to the rollup row identified by keys, creating it if missing"""
+    table = model.__table__
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table).values(**keys, **increments)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={
+                **{column: table.c[column] + stmt.excluded[column] for column in increments},
+                "updated_at": func.now()
+            }
+        )
+        connection.execute(stmt)
+        return
+
+    conditions = [table.c[column] == value for column, value in keys.items()]
+    result = connection.execute(
+        table.update().where(*conditions).values(
+            **{column: table.c[column] + value for column, value in increments.items()}
+        )
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(**keys, **increments))
+
+def _apply(connection, deltas: RollupDeltas):
+    for (day, status), (count, revenue) in deltas.revenue.items():
+        if count or revenue:
+            _upsert(connection, DailyRevenueRollup,
+                    {"day": day, "status": status}, {"order_count": count, "revenue": revenue})
+    for (day, product_id, status), (items, units, revenue) in deltas.product_sales.items():
+        if items or units or revenue:
+            _upsert(connection, DailyProductSalesRollup,
+                    {"day": day, "product_id": product_id, "status": status},
+                    {"item_count": items, "units": units, "revenue": revenue})
+    for (day, reason), count in deltas.price_changes.items():
+        if count:
+            _upsert(connection, DailyPriceChangeRollup,
+                    {"day": day, "reason": reason}, {"change_count": count})
+
+# Only ORM flushes reach these hooks. Core update()/insert(), bulk_* methods and scripts using
+# raw SQL change orders without touching the rollups; run rebuild_rollups (backfill_rollups.py) after them.
+@event.listens_for(Session, "before_flush")
+def _collect_rollup_deltas(session, flush_context, instances):
+    deltas = RollupDeltas()
+    with session.no_autoflush:
+        _collect(session, deltas)
+    session.info[_DELTAS_KEY] = deltas
+
+@event.listens_for(Session, "after_flush")
+def _apply_rollup_deltas(session, flush_context):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if deltas is not None:
+        _apply(session.connection(), deltas)
+
+def rebuild_rollups_if_empty(db: Session) -> bool:
+    """Rebuild when orders or price history exist but the rollups were never filled, e.g. after an upgrade"""
+    missing_revenue = (db.query(DailyRevenueRollup.day).first() is None
+                       and db.query(Order.id).first() is not None)
+    missing_changes = (db.query(DailyPriceChangeRollup.day).first() is None
+                       and db.query(PriceHistory.id).first() is not None)
+    if not (missing_revenue or missing_changes):
+        return False
+    rebuild_rollups(db)
+    return True
+
+def rebuild_rollups(db: Session):
+    """Recompute every rollup table from orders, order items and price history"""
+    for model in (DailyRevenueRollup, DailyProductSalesRollup, DailyPriceChangeRollup):
+        db.query(model).delete(synchronize_session=False)
+
+    def as_date(value) -> date:
+        if isinstance(value, date):
+            return value
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+    order_day = func.date(Order.created_at)
+    revenue_rows = db.query(
+        order_day, Order.status, func.count(Order.id), func.coalesce(func.sum(Order.total_amount), 0.0)
+    ).group_by(order_day, Order.status).all()
+    db.bulk_insert_mappings(DailyRevenueRollup, [
+        {"day": as_date(day), "status": _status(status), "order_count": count, "revenue": revenue}
+        for day, status, count, revenue in revenue_rows
+    ])
+
+    sales_rows = db.query(
+        order_day, OrderItem.product_id, Order.status, func.count(OrderItem.id),
+        func.coalesce(func.sum(OrderItem.quantity), 0),
+        func.coalesce(func.sum(OrderItem.quantity * OrderItem.price_at_time), 0.0)
+    ).join(Order).group_by(order_day, OrderItem.product_id, Order.status).all()
+    db.bulk_insert_mappings(DailyProductSalesRollup, [
+        {"day": as_date(day), "product_id": product_id, "status": _status(status),
+         "item_count": items, "units": units, "revenue": revenue}
+        for day, product_id, status, items, units, revenue in sales_rows
+    ])
+
+    change_day = func.date(PriceHistory.created_at)
+    change_rows = db.query(
+        change_day, func.coalesce(PriceHistory.reason, ''), func.count(PriceHistory.id)
+    ).group_by(change_day, func.coalesce(PriceHistory.reason, '')).all()
+    db.bulk_insert_mappings(DailyPriceChangeRollup, [
+        {"day": as_date(day), "reason": reason, "change_count": count}
+        for day, reason, count in change_rows
+    ])
+
+    db.commit()
+    return {
+        "revenue_rows": len(revenue_rows),
+        "product_sales_rows": len(sales_rows),
+        "price_change_rows": len(change_rows)
+    }
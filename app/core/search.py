@@ -0,0 +1,141 @@
+"""
+Product Full-Text Search
+SQLite: an external-content FTS5 table over products kept in sync by triggers, ranked with bm25.
+PostgreSQL: a generated, weighted tsvector column with a GIN index, ranked with ts_rank.
+Other databases fall back to a LIKE scan.
+"""
+
+import re
+from typing import List, Optional
+
+from sqlalchemy import text, or_
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+
+FTS_TABLE = "products_fts"
+
+# Column weights: name matters most, then category, then description
+_SQLITE_RANK = f"bm25({FTS_TABLE}, 10.0, 1.0, 4.0)"
+
+_SQLITE_SETUP = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description, category,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+    END""",
+    # Only text changes touch the index, so bulk repricing never pays for re-tokenizing
+    f"""CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, description, category ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+        INSERT INTO {FTS_TABLE}(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END""",
+]
+
+_POSTGRES_SETUP = [
+    """ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(category, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)",
+]
+
+_search_backend: Optional[str] = None
+
+def setup_product_search(engine) -> str:
+    """Create the search index and its sync triggers if missing; returns the backend in use"""
+    global _search_backend
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if dialect == "sqlite":
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": FTS_TABLE}
+                ).first()
+                for statement in _SQLITE_SETUP:
+                    conn.execute(text(statement))
+                if not exists:
+                    # Index the products that were there before the table existed
+                    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+                _search_backend = "fts5"
+            elif dialect == "postgresql":
+                for statement in _POSTGRES_SETUP:
+                    conn.execute(text(statement))
+                _search_backend = "tsvector"
+            else:
+                _search_backend = "like"
+    except OperationalError as e:
+        # e.g. an SQLite build without FTS5
+        print(f"Full-text search unavailable, falling back to LIKE: {e}")
+        _search_backend = "like"
+    return _search_backend
+
+def _terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query.lower())[:16]
+
+def fts5_query(query: str) -> str:
+    """Every word must match, as a prefix: 'wireless head' -> "wireless"* AND "head"*"""
+    return " AND ".join(f'"{term}"*' for term in _terms(query))
+
+def tsquery(query: str) -> str:
+    return " & ".join(f"{term}:*" for term in _terms(query))
+
+def search_product_ids(db: Session, query: str, limit: int = 20, offset: int = 0,
+                       category: Optional[str] = None) -> List[int]:
+    """Ids of active products matching query, best match first"""
+    if not _terms(query):
+        return []
+
+    backend = _search_backend or setup_product_search(db.get_bind())
+    params = {"limit": limit, "offset": offset, "category": category}
+    category_filter = "AND p.category = :category" if category else ""
+
+    if backend == "fts5":
+        rows = db.execute(text(f"""
+            SELECT p.id FROM {FTS_TABLE} f JOIN products p ON p.id = f.rowid
+            WHERE {FTS_TABLE} MATCH :match AND p.is_active = 1 {category_filter}
+            ORDER BY {_SQLITE_RANK}, p.id
+            LIMIT :limit OFFSET :offset
+        """), {**params, "match": fts5_query(query)})
+        return [row[0] for row in rows]
+
+    if backend == "tsvector":
+        rows = db.execute(text(f"""
+            SELECT p.id FROM products p, to_tsquery('english', :match) q
+            WHERE p.search_vector @@ q AND p.is_active {category_filter}
+            ORDER BY ts_rank(p.search_vector, q) DESC, p.id
+            LIMIT :limit OFFSET :offset
+        """), {**params, "match": tsquery(query)})
+        return [row[0] for row in rows]
+
+    conditions = [
+        or_(Product.name.ilike(f"%{term}%"),
+            Product.description.ilike(f"%{term}%"),
+            Product.category.ilike(f"%{term}%"))
+        for term in _terms(query)
+    ]
+    like_query = db.query(Product.id).filter(Product.is_active == True, *conditions)
+    if category:
+        like_query = like_query.filter(Product.category == category)
+    return [row[0] for row in like_query.order_by(Product.id).offset(offset).limit(limit)]
+
+def search_products(db: Session, query: str, limit: int = 20, offset: int = 0,
+                    category: Optional[str] = None) -> List[Product]:
+    """Matching products in rank order"""
+    ids = search_product_ids(db, query, limit, offset, category)
+    if not ids:
+        return []
+    products = {product.id: product for product in db.query(Product).filter(Product.id.in_(ids))}
+    return [products[product_id] for product_id in ids if product_id in products]
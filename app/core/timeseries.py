@@ -0,0 +1,96 @@
+"""
+Time Series Helpers
+Dialect-aware SQL bucketing of timestamps plus gap-filling of the bucketed rows,
+so a whole series comes from one GROUP BY query
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+
+GRANULARITIES = ("hour", "day", "week", "month")
+
+LABEL_FORMATS = {
+    "hour": "%b %d %H:00",
+    "day": "%b %d",
+    "week": "%b %d",
+    "month": "%b %Y"
+}
+
+# SQLite stores timestamps as text, so buckets are rendered as the same text format
+_SQLITE_BUCKETS = {
+    "hour": ("%Y-%m-%d %H:00:00",),
+    "day": ("%Y-%m-%d 00:00:00",),
+    "week": ("%Y-%m-%d 00:00:00", "weekday 0", "-6 days"),  # Monday of the week
+    "month": ("%Y-%m-01 00:00:00",)
+}
+
+def bucket_expression(column, dialect_name: str, granularity: str):
+    """SQL expression truncating column to the start of its bucket"""
+    if dialect_name == "sqlite":
+        fmt, *modifiers = _SQLITE_BUCKETS[granularity]
+        return func.strftime(fmt, column, *modifiers)
+    # PostgreSQL (and anything else with date_trunc); weeks start on Monday there too
+    return func.date_trunc(granularity, column)
+
+def floor_bucket(moment: datetime, granularity: str) -> datetime:
+    """Start of the bucket containing moment, matching bucket_expression"""
+    moment = moment.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+    if granularity == "hour":
+        return moment
+    moment = moment.replace(hour=0)
+    if granularity == "week":
+        return moment - timedelta(days=moment.weekday())
+    if granularity == "month":
+        return moment.replace(day=1)
+    return moment
+
+def next_bucket(bucket: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return bucket + timedelta(hours=1)
+    if granularity == "day":
+        return bucket + timedelta(days=1)
+    if granularity == "week":
+        return bucket + timedelta(weeks=1)
+    if bucket.month == 12:
+        return bucket.replace(year=bucket.year + 1, month=1)
+    return bucket.replace(month=bucket.month + 1)
+
+def bucket_range(start: datetime, end: datetime, granularity: str) -> List[datetime]:
+    """Every bucket start from the bucket containing start through the one containing end"""
+    buckets = []
+    bucket = floor_bucket(start, granularity)
+    last = floor_bucket(end, granularity)
+    while bucket <= last:
+        buckets.append(bucket)
+        bucket = next_bucket(bucket, granularity)
+    return buckets
+
+def count_buckets(start: datetime, end: datetime, granularity: str) -> int:
+    """Cheap upper bound on len(bucket_range(...)) for validating requested ranges"""
+    span = floor_bucket(end, granularity) - floor_bucket(start, granularity)
+    step = {"hour": timedelta(hours=1), "day": timedelta(days=1),
+            "week": timedelta(weeks=1), "month": timedelta(days=28)}[granularity]
+    return int(span / step) + 1
+
+def parse_bucket(value) -> Optional[datetime]:
+    """Normalize a bucket value returned by the database to a naive datetime"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    return datetime.strptime(str(value)[:19], "%Y-%m-%d %H:%M:%S")
+
+def fill_series(rows, buckets: List[datetime], granularity: str) -> Dict[str, List]:
+    """Turn (bucket, value) rows into labels/data lists with zeros for empty buckets"""
+    values = {}
+    for bucket, value in rows:
+        key = parse_bucket(bucket)
+        values[key] = values.get(key, 0.0) + float(value or 0)
+
+    label_format = LABEL_FORMATS[granularity]
+    return {
+        "labels": [bucket.strftime(label_format) for bucket in buckets],
+        "data": [values.get(bucket, 0.0) for bucket in buckets]
+    }
@@ -6,16 +6,17 @@ import uvicorn
 
 from app.api import auth, products, cart, orders, admin, analytics
 from app.core.config import settings
-from app.core.database import engine
+from app.core.database import engine, SessionLocal
+from app.core.paystack import close_paystack_client
+from app.core.rollups import rebuild_rollups_if_empty
+from app.core.search import setup_product_search
 from app.models import base
 import logging
 from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy.orm import Session
-from app.ml.train_model import ModelTrainer
-from app.ml.dynamic_pricing_model import DynamicPricingEngine
-from app.models.product import Product
-from app.core.database import SessionLocal
-import datetime
+from app.ml.training_jobs import submit_training_job, wait_for_training_job, shutdown_training_pool
+from app.ml.repricing import reprice_active_products
+from app.scrapers.catalog_refresh import CatalogRefreshRun
+from app.models.product import Product, CompetitorPrice
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -24,6 +25,25 @@ logger = logging.getLogger(__name__)
 # Create database tables
 base.Base.metadata.create_all(bind=engine)
 
+# create_all skips indexes on tables that already exist, so add any new ones explicitly
+for model in (Product, CompetitorPrice):
+    for index in model.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+# Full-text search index over products (FTS5 on SQLite, tsvector on PostgreSQL)
+setup_product_search(engine)
+
+# Databases that predate the rollup tables would otherwise show zeros on every dashboard
+_rollup_db = SessionLocal()
+try:
+    if rebuild_rollups_if_empty(_rollup_db):
+        logger.info("Rebuilt analytics rollups from existing orders and price history")
+except Exception as e:
+    _rollup_db.rollback()
+    logger.error(f"Rebuilding analytics rollups failed: {e}")
+finally:
+    _rollup_db.close()
+
 app = FastAPI(
     title="AI-Driven Dynamic Pricing Engine",
     description="Ecommerce platform with AI-powered dynamic pricing",
@@ -37,6 +57,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination headers browsers may read from cross-origin responses
+    expose_headers=["X-Next-Cursor", "X-Total-Count"],
 )
 
 # Mount static files
@@ -56,45 +78,57 @@ app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"]
 def retrain_and_update_prices():
     logger.info("Starting scheduled model retraining and price update...")
     try:
-        # Retrain the model
-        trainer = ModelTrainer()
-        trainer.train()
-        logger.info("Model retrained successfully.")
-        # Load the trained model for price prediction
-        engine = DynamicPricingEngine()
-        engine.load_model()
-        # Open DB session
-        db: Session = SessionLocal()
-        products = db.query(Product).filter(Product.is_active == True).all()
-        updated_count = 0
-        for product in products:
-            # Example: gather features for prediction
-            # You may want to fetch demand, competition, and user behavior metrics here
-            product_data = {
-                'base_price': product.base_price,
-                'competitor_avg_price': product.base_price,  # TODO: Replace with real competitor data
-                'demand_score': 1.0,  # TODO: Replace with real demand score
-                'stock_level': product.stock_quantity,
-                'seasonality_factor': engine.calculate_seasonality_factor(datetime.datetime.now().month),
-                'user_engagement': 1.0,  # TODO: Replace with real engagement
-                'conversion_rate': 1.0,  # TODO: Replace with real conversion rate
-                'time_since_last_price_change': 1.0  # TODO: Replace with real value
-            }
-            new_price = engine.predict_optimal_price(product_data)
-            if new_price > 0:
-                product.current_price = float(new_price)
-                updated_count += 1
-        db.commit()
-        db.close()
+        # Retrain the model in the worker pool; this runs on the scheduler thread so waiting is fine
+        job = wait_for_training_job(submit_training_job())
+        if job.get('status') != 'completed':
+            raise RuntimeError(f"training job {job.get('job_id')} {job.get('status')}: {job.get('error')}")
+        if not job.get('promoted'):
+            logger.warning(
+                f"Model version {job.get('version')} from job {job['job_id']} was not promoted; "
+                f"skipping the price update"
+            )
+            return
+        logger.info(f"Model retrained successfully (job {job['job_id']}, version {job['version']}).")
+        updated_count = reprice_active_products()
         logger.info(f"Updated prices for {updated_count} products.")
     except Exception as e:
         logger.error(f"Scheduled retraining or price update failed: {e}")
 
+def refresh_catalog_competitor_prices():
+    logger.info("Starting catalog competitor price refresh...")
+    try:
+        # Shares the update-price refresher so the same product is never scraped twice at once
+        summary = CatalogRefreshRun(products.price_refresher).run()
+        if summary is None:
+            logger.info("Catalog competitor price refresh is already running in another worker")
+            return
+        logger.info(
+            f"Refreshed competitor prices for {summary['processed']} products "
+            f"({summary['failed']} failed) at {summary['products_per_second']:.2f} products/sec"
+        )
+    except Exception as e:
+        logger.error(f"Catalog competitor price refresh failed: {e}")
+
 # Set up the scheduler to run daily
 scheduler = BackgroundScheduler()
 scheduler.add_job(retrain_and_update_prices, 'interval', days=1)
+# Resumes from its checkpoint if the previous run was interrupted within the last interval.
+# Every worker process registers this job; a lock file beside the checkpoint lets one run at a time
+scheduler.add_job(
+    refresh_catalog_competitor_prices, 'interval',
+    hours=settings.CATALOG_REFRESH_INTERVAL_HOURS, max_instances=1, coalesce=True
+)
 scheduler.start()
 
+@app.on_event("shutdown")
+def shutdown_background_workers():
+    scheduler.shutdown(wait=False)
+    shutdown_training_pool()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await close_paystack_client()
+
 @app.get("/")
 async def home(request: Request):
     """Main ecommerce store page"""
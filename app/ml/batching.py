@@ -0,0 +1,120 @@
+"""
+Micro-batching for price predictions
+Collects concurrent prediction requests for up to PRICING_BATCH_MAX_WAIT_MS or
+PRICING_BATCH_MAX_SIZE items and answers them all with one batched forward pass
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+import anyio.from_thread
+
+from app.core import metrics
+from app.core.config import settings
+from app.ml.dynamic_pricing_model import DynamicPricingEngine
+
+batch_size_histogram = metrics.histogram(
+    "pricing_batch_size", [1, 2, 4, 8, 16, 32, 64, 128, 256],
+    "Predictions per batched forward pass"
+)
+queue_wait_histogram = metrics.histogram(
+    "pricing_queue_wait_ms", [0.1, 0.5, 1, 2, 5, 10, 25, 50, 100],
+    "Time a prediction request waited for its batch, in milliseconds"
+)
+
+class PredictionBatcher:
+    def __init__(self, engine: DynamicPricingEngine, max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None, max_in_flight: Optional[int] = None):
+        self.engine = engine
+        self.max_batch_size = max_batch_size or settings.PRICING_BATCH_MAX_SIZE
+        self.max_in_flight = max_in_flight or settings.PRICING_BATCH_MAX_IN_FLIGHT
+        if max_wait_ms is None:
+            max_wait_ms = settings.PRICING_BATCH_MAX_WAIT_MS
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+    
+    async def predict(self, product_data: Dict) -> float:
+        """Queue one prediction and wait for the batch it lands in"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((product_data, future, time.perf_counter()))
+        return await future
+    
+    def predict_from_thread(self, product_data: Dict) -> float:
+        """Blocking variant for sync FastAPI endpoints running in the worker threadpool"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            # Waiting here would block the very loop that has to run the batch
+            raise RuntimeError("predict_from_thread called on the event loop thread; await predict() instead")
+        
+        started = False
+        
+        async def predict():
+            nonlocal started
+            started = True
+            return await self.predict(product_data)
+        
+        try:
+            return anyio.from_thread.run(predict)
+        except RuntimeError:
+            # Errors from the prediction itself propagate; only fall back when there was
+            # no event loop to hand the call to (scripts, scheduler jobs, closed loop)
+            if started:
+                raise
+            return self.engine.predict_optimal_price(product_data)
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        # Up to max_in_flight batches are predicted while the next one collects requests
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        flushes = set()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await in_flight.acquire()
+            task = loop.create_task(self._flush(batch))
+            flushes.add(task)
+            task.add_done_callback(lambda done: (flushes.discard(done), in_flight.release()))
+    
+    async def _flush(self, batch: List[Tuple[Dict, asyncio.Future, float]]):
+        now = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            queue_wait_histogram.observe((now - enqueued_at) * 1000.0)
+        batch_size_histogram.observe(len(batch))
+        
+        # Off the event loop: besides the forward pass, predict_batch may load a model
+        # or check the registry on disk
+        try:
+            prices = await asyncio.to_thread(
+                self.engine.predict_batch, [product_data for product_data, _, _ in batch]
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future, _), price in zip(batch, prices):
+            if not future.done():
+                future.set_result(float(price))
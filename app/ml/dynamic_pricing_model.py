@@ -1,61 +1,122 @@
-import torch
-import torch.nn as nn
-import torch.optim as optim
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-import joblib
+from typing import Callable, Dict, List, Tuple, Optional, Union, NamedTuple
+from datetime import datetime
+import json
 import os
+import threading
+import time
 
-class DynamicPricingModel(nn.Module):
-    def __init__(self, input_size: int, hidden_size: int = 128):
-        super(DynamicPricingModel, self).__init__()
-        self.network = nn.Sequential(
-            nn.Linear(input_size, hidden_size),
-            nn.ReLU(),
-            nn.Dropout(0.2),
-            nn.Linear(hidden_size, hidden_size // 2),
-            nn.ReLU(),
-            nn.Dropout(0.2),
-            nn.Linear(hidden_size // 2, hidden_size // 4),
-            nn.ReLU(),
-            nn.Linear(hidden_size // 4, 1)
-        )
-        
-    def forward(self, x):
-        return self.network(x)
+from app.core.config import settings
+from app.ml.model_registry import ModelRegistry
+from app.ml.numpy_runtime import NumpyPricingModel, NUMPY_WEIGHTS_FILE
+from app.ml.prediction_cache import PredictionCache, get_shared_prediction_cache
+
+DEFAULT_FEATURE_NAMES = [
+    'base_price', 'competitor_avg_price', 'demand_score', 
+    'stock_level', 'seasonality_factor', 'user_engagement',
+    'conversion_rate', 'time_since_last_price_change'
+]
+
+# Version tag for a model loaded from the pre-registry fixed path
+LEGACY_VERSION = "legacy"
+
+class IncompatibleModelError(ValueError):
+    """A model version whose inputs pricing callers do not supply"""
+
+def missing_serving_features(feature_names: List[str]) -> List[str]:
+    """Model inputs absent from the product data callers pass (keyed by DEFAULT_FEATURE_NAMES)"""
+    return [name for name in feature_names if name not in DEFAULT_FEATURE_NAMES]
+
+def __getattr__(name):
+    # The torch network is only imported when asked for, so serving with the
+    # NumPy backend never pulls torch into the process
+    if name == 'DynamicPricingModel':
+        from app.ml.pricing_network import DynamicPricingModel
+        return DynamicPricingModel
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class LoadedModel(NamedTuple):
+    version: str
+    backend: str  # "numpy" or "torch"
+    model: object
+    predict: Callable[[np.ndarray], np.ndarray]  # unscaled features -> prices
+    feature_names: List[str]
+
+# Models are loaded once per process and shared by every engine instance,
+# keyed by registry root. Readers never take the lock; it only serializes loads.
+_loaded_models: Dict[str, LoadedModel] = {}
+_load_lock = threading.Lock()
+# Last version per registry root refused as incompatible, so it is not reloaded on every check
+_rejected_versions: Dict[str, str] = {}
 
 class DynamicPricingEngine:
-    def __init__(self, model_path: str = "app/ml/models/dynamic_pricing_model.pth"):
+    def __init__(self, model_path: str = "app/ml/models/dynamic_pricing_model.pth",
+                 registry: Optional[ModelRegistry] = None,
+                 prediction_cache: Optional[PredictionCache] = None):
         self.model_path = model_path
-        self.model = None
-        self.scaler = StandardScaler()
-        self.feature_names = [
-            'base_price', 'competitor_avg_price', 'demand_score', 
-            'stock_level', 'seasonality_factor', 'user_engagement',
-            'conversion_rate', 'time_since_last_price_change'
-        ]
-        
-    def prepare_features(self, product_data: Dict) -> np.ndarray:
+        self.registry = registry or ModelRegistry()
+        self.prediction_cache = prediction_cache or get_shared_prediction_cache()
+        self.feature_names = list(DEFAULT_FEATURE_NAMES)
+        self._loaded: Optional[LoadedModel] = None
+        self._next_version_check = 0.0
+    
+    @property
+    def model(self):
+        return self._loaded.model if self._loaded else None
+    
+    @property
+    def model_version(self) -> Optional[str]:
+        return self._loaded.version if self._loaded else None
+        
+    def prepare_features(self, product_data: Dict, feature_names: Optional[List[str]] = None) -> np.ndarray:
         """Prepare features for the model"""
         features = []
-        for feature in self.feature_names:
+        for feature in feature_names or self.feature_names:
             if feature in product_data:
                 features.append(product_data[feature])
             else:
                 features.append(0.0)  # Default value
         return np.array(features).reshape(1, -1)
     
+    def prepare_feature_matrix(self, products: Union[List[Dict], pd.DataFrame, np.ndarray],
+                               feature_names: Optional[List[str]] = None) -> np.ndarray:
+        """Prepare a (n_products, n_features) matrix for batch prediction"""
+        feature_names = feature_names or self.feature_names
+        if isinstance(products, np.ndarray):
+            matrix = np.asarray(products, dtype=np.float64)
+            if matrix.ndim == 1:
+                matrix = matrix.reshape(1, -1)
+            if matrix.shape[1] != len(feature_names):
+                raise ValueError(
+                    f"Expected {len(feature_names)} feature columns, got {matrix.shape[1]}"
+                )
+            return matrix
+        
+        if not isinstance(products, pd.DataFrame):
+            products = pd.DataFrame(list(products))
+        
+        # Missing feature columns fall back to the same default as prepare_features
+        return products.reindex(columns=feature_names).fillna(0.0).to_numpy(dtype=np.float64)
+    
     def train_model(self, training_data: List[Dict]):
         """Train the dynamic pricing model"""
+        import torch
+        import torch.nn as nn
+        import torch.optim as optim
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.model_selection import train_test_split
+        from app.ml.pricing_network import DynamicPricingModel
+        from app.ml.model_export import export_all
+        
+        feature_names = list(DEFAULT_FEATURE_NAMES)
+        
         # Prepare training data
         X = []
         y = []
         
         for data_point in training_data:
-            features = self.prepare_features(data_point)
+            features = self.prepare_features(data_point, feature_names)
             X.append(features.flatten())
             y.append(data_point['optimal_price'])
         
@@ -66,19 +127,20 @@ class DynamicPricingEngine:
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
         # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
         
         # Initialize model
-        self.model = DynamicPricingModel(input_size=len(self.feature_names))
+        model = DynamicPricingModel(input_size=len(feature_names))
         criterion = nn.MSELoss()
-        optimizer = optim.Adam(self.model.parameters(), lr=0.001)
+        optimizer = optim.Adam(model.parameters(), lr=0.001)
         
         # Training loop
         epochs = 100
         for epoch in range(epochs):
             optimizer.zero_grad()
-            outputs = self.model(torch.FloatTensor(X_train_scaled))
+            outputs = model(torch.FloatTensor(X_train_scaled))
             loss = criterion(outputs.squeeze(), torch.FloatTensor(y_train))
             loss.backward()
             optimizer.step()
@@ -86,43 +148,161 @@ class DynamicPricingEngine:
             if epoch % 20 == 0:
                 print(f'Epoch {epoch}, Loss: {loss.item():.4f}')
         
-        # Save model
-        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        torch.save(self.model.state_dict(), self.model_path)
-        joblib.dump(self.scaler, self.model_path.replace('.pth', '_scaler.pkl'))
-        
         # Evaluate model
-        self.model.eval()
+        model.eval()
         with torch.no_grad():
-            test_outputs = self.model(torch.FloatTensor(X_test_scaled))
+            test_outputs = model(torch.FloatTensor(X_test_scaled))
             test_loss = criterion(test_outputs.squeeze(), torch.FloatTensor(y_test))
             print(f'Test Loss: {test_loss.item():.4f}')
+        
+        # Publish as a new registry version and switch this process over to it
+        self.registry.publish(model.state_dict(), {
+            'feature_columns': feature_names,
+            'model_architecture': 'DynamicPricingModel',
+            'training_date': datetime.now().isoformat(),
+            'metrics': {'test_mse': test_loss.item()}
+        }, scaler=scaler, exporter=lambda output_dir: export_all(
+            model, output_dir, input_size=len(feature_names), scaler=scaler
+        ))
+        self.load_model()
     
-    def load_model(self):
-        """Load the trained model"""
-        if os.path.exists(self.model_path):
-            self.model = DynamicPricingModel(input_size=len(self.feature_names))
-            self.model.load_state_dict(torch.load(self.model_path))
-            self.model.eval()
-            
+    def _resolve_version(self) -> Optional[str]:
+        """Version that should be served: the promoted one, else the legacy fixed file"""
+        version = self.registry.current_version()
+        if version is None and os.path.exists(self.model_path):
+            return LEGACY_VERSION
+        return version
+    
+    def _load_version(self, version: str) -> LoadedModel:
+        backend = settings.INFERENCE_BACKEND
+        
+        if version == LEGACY_VERSION:
+            metadata_path = self.model_path.replace('.pth', '_metadata.json')
+            metadata = {}
+            if os.path.exists(metadata_path):
+                with open(metadata_path) as f:
+                    metadata = json.load(f)
+        else:
+            metadata = self.registry.load_metadata(version)
+        feature_names = metadata.get('feature_columns') or list(DEFAULT_FEATURE_NAMES)
+        missing = missing_serving_features(feature_names)
+        if missing:
+            # Filling these with zeros would serve confident but meaningless prices
+            raise IncompatibleModelError(f"it expects features callers do not supply: {', '.join(missing)}")
+        
+        # NumPy backend: plain matmuls over exported weights, no torch/sklearn import
+        npz_path = None if version == LEGACY_VERSION else self.registry.artifact_path(version, NUMPY_WEIGHTS_FILE)
+        if backend in ('auto', 'numpy') and npz_path:
+            model = NumpyPricingModel.from_npz(npz_path)
+            return LoadedModel(version, 'numpy', model, model.predict, feature_names)
+        if backend == 'numpy':
+            raise FileNotFoundError(f"Model version {version} has no {NUMPY_WEIGHTS_FILE} export")
+        
+        import torch
+        import joblib
+        from app.ml.pricing_network import DynamicPricingModel, make_torch_predictor
+        
+        if version == LEGACY_VERSION:
+            state_dict = torch.load(self.model_path, map_location='cpu')
             scaler_path = self.model_path.replace('.pth', '_scaler.pkl')
-            if os.path.exists(scaler_path):
-                self.scaler = joblib.load(scaler_path)
-            return True
-        return False
+            scaler = joblib.load(scaler_path) if os.path.exists(scaler_path) else None
+        else:
+            state_dict, scaler, _ = self.registry.load(version)
+        
+        model = DynamicPricingModel(input_size=len(feature_names))
+        model.load_state_dict(state_dict)
+        return LoadedModel(version, 'torch', model, make_torch_predictor(model, scaler), feature_names)
+    
+    def _load_shared(self, version: str, block: bool) -> Optional[LoadedModel]:
+        """Load a version into the process-wide cache, or reuse it if another engine already did"""
+        key = self.registry.root
+        shared = _loaded_models.get(key)
+        if shared is not None and shared.version == version:
+            return shared
+        
+        # If we already have a model to serve, never wait for another thread's load
+        if not _load_lock.acquire(blocking=block):
+            return None
+        try:
+            shared = _loaded_models.get(key)
+            if shared is None or shared.version != version:
+                shared = self._load_version(version)
+                _loaded_models[key] = shared
+            return shared
+        except IncompatibleModelError as e:
+            _rejected_versions[key] = version
+            print(f"Refusing to serve model version {version}: {e}")
+            return None
+        except Exception as e:
+            print(f"Error loading model version {version}: {e}")
+            return None
+        finally:
+            _load_lock.release()
+    
+    def _current_model(self) -> Optional[LoadedModel]:
+        """Return the model to serve, swapping in a newly promoted version when one appears"""
+        loaded = self._loaded
+        now = time.monotonic()
+        if now < self._next_version_check:
+            return loaded
+        self._next_version_check = now + settings.MODEL_RELOAD_INTERVAL_SECONDS
+        
+        version = self._resolve_version()
+        if version is None or (loaded is not None and loaded.version == version):
+            return loaded
+        if _rejected_versions.get(self.registry.root) == version:
+            # Keep serving the previous model, or base prices if there is none
+            return loaded
+        
+        shared = self._load_shared(version, block=loaded is None)
+        if shared is not None:
+            # Single reference assignment: concurrent readers see the old or the new model, never a mix
+            self._loaded = loaded = shared
+            self.feature_names = shared.feature_names
+        return loaded
+    
+    def load_model(self):
+        """Load the current model version, returning whether one is available"""
+        self._next_version_check = 0.0
+        return self._current_model() is not None
     
     def predict_optimal_price(self, product_data: Dict) -> float:
         """Predict optimal price for a product"""
-        if self.model is None:
-            if not self.load_model():
-                return product_data.get('base_price', 0.0)
+        loaded = self._current_model()
+        if loaded is None:
+            return product_data.get('base_price', 0.0)
         
-        features = self.prepare_features(product_data)
-        features_scaled = self.scaler.transform(features)
+        features = self.prepare_features(product_data, loaded.feature_names)
+        return float(self._predict(loaded, features)[0])
+    
+    def predict_batch(self, products: Union[List[Dict], pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """Predict optimal prices for many products with a single forward pass"""
+        loaded = self._current_model()
+        if loaded is None:
+            # Same fallback as predict_optimal_price: keep the base price
+            features = self.prepare_feature_matrix(products, DEFAULT_FEATURE_NAMES)
+            return features[:, DEFAULT_FEATURE_NAMES.index('base_price')].copy()
         
-        with torch.no_grad():
-            prediction = self.model(torch.FloatTensor(features_scaled))
-            return prediction.item()
+        features = self.prepare_feature_matrix(products, loaded.feature_names)
+        if features.shape[0] == 0:
+            return np.empty(0, dtype=np.float64)
+        return self._predict(loaded, features)
+    
+    def _predict(self, loaded: LoadedModel, features: np.ndarray) -> np.ndarray:
+        """Run the model on a feature matrix, answering unchanged inputs from the cache"""
+        cache = self.prediction_cache
+        if cache is None:
+            return loaded.predict(features)
+        
+        keys = cache.keys_for(features)
+        cached = cache.get_many(loaded.version, keys)
+        misses = [i for i, price in enumerate(cached) if price is None]
+        prices = np.array([np.nan if price is None else price for price in cached], dtype=np.float64)
+        if misses:
+            miss_prices = loaded.predict(features[misses])
+            prices[misses] = miss_prices
+            cache.put_many(loaded.version, [keys[i] for i in misses], miss_prices)
+        return prices
     
     def calculate_demand_score(self, views: int, add_to_cart: int, purchases: int) -> float:
         """Calculate demand score based on user behavior"""
@@ -0,0 +1,132 @@
+"""
+Training Feature Store
+Builds the model's training features from processed data (CSV, Parquet or Feather) and
+caches them as an uncompressed Arrow IPC file holding one float32 row-major feature matrix,
+which later retrains memory-map and view as NumPy arrays without copying
+"""
+
+import os
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+FEATURE_COLUMNS = [
+    'price_log', 'title_length', 'word_count', 'category_encoded',
+    'cat_mean_price', 'cat_std_price', 'price_percentile',
+    'views', 'add_to_cart', 'purchases', 'conversion_rate',
+    'stock_percentage', 'competitor_price', 'price_ratio', 'month'
+]
+TARGET_COLUMN = 'optimal_price'
+
+# Columns of the processed dataset the features are derived from
+SOURCE_COLUMNS = [
+    'price', 'category', 'title_length', 'word_count', 'views', 'add_to_cart',
+    'purchases', 'stock_quantity', 'competitor_price', 'month', TARGET_COLUMN
+]
+
+FEATURE_CACHE_SUFFIX = ".features.arrow"
+# The cache stores FEATURE_COLUMNS as one fixed-size list column, in this order
+FEATURE_MATRIX_COLUMN = 'features'
+FEATURE_NAMES_METADATA = b'feature_columns'
+
+def add_training_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Derive category statistics, ratios and encodings from processed product rows"""
+    # Category encoding
+    df['category_encoded'] = pd.Categorical(df['category']).codes
+
+    # Price features
+    df['price_log'] = np.log(df['price'] + 1)
+
+    # Category statistics
+    cat_stats = df.groupby('category').agg({
+        'price': ['mean', 'std']
+    }).reset_index()
+    cat_stats.columns = ['category', 'cat_mean_price', 'cat_std_price']
+
+    df = df.merge(cat_stats, on='category', how='left')
+    df['cat_std_price'] = df['cat_std_price'].fillna(df['cat_std_price'].mean())
+
+    # Price percentile
+    df['price_percentile'] = df.groupby('category')['price'].rank(pct=True)
+
+    # Derived features
+    df['conversion_rate'] = df['purchases'] / df['views'].replace(0, 1)
+    df['stock_percentage'] = df['stock_quantity'] / df['stock_quantity'].max()
+    df['price_ratio'] = df['price'] / df['competitor_price'].replace(0, 1)
+
+    # Anything still missing gets a neutral default
+    for col in FEATURE_COLUMNS:
+        if col not in df.columns:
+            print(f"Warning: Column {col} not found, adding default values")
+            df[col] = 0.0
+
+    return df
+
+def feature_cache_path(data_path: str) -> str:
+    return data_path + FEATURE_CACHE_SUFFIX
+
+def read_source_columns(data_path: str, columns: List[str]) -> pd.DataFrame:
+    """Read only the requested columns, memory-mapping columnar formats"""
+    extension = os.path.splitext(data_path)[1].lower()
+    if extension == '.parquet':
+        return pd.read_parquet(data_path, columns=columns, memory_map=True)
+    if extension in ('.feather', '.arrow'):
+        return pd.read_feather(data_path, columns=columns, memory_map=True)
+    return pd.read_csv(data_path, usecols=lambda column: column in columns)
+
+def build_feature_cache(data_path: str) -> str:
+    """Compute training features from data_path and write them as a float32 Arrow file"""
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    df = read_source_columns(data_path, SOURCE_COLUMNS)
+    df = add_training_features(df)
+    matrix = np.ascontiguousarray(df[FEATURE_COLUMNS].to_numpy(dtype=np.float32))
+    features = pa.FixedSizeListArray.from_arrays(pa.array(matrix.ravel()), len(FEATURE_COLUMNS))
+    table = pa.table({
+        FEATURE_MATRIX_COLUMN: features,
+        TARGET_COLUMN: pa.array(df[TARGET_COLUMN].to_numpy(dtype=np.float32))
+    }).replace_schema_metadata({FEATURE_NAMES_METADATA: ','.join(FEATURE_COLUMNS).encode()})
+
+    # Uncompressed and in a single record batch, so readers can map each column as one buffer
+    cache_path = feature_cache_path(data_path)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    feather.write_feather(table, tmp_path, compression='uncompressed', chunksize=max(table.num_rows, 1))
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+def _cached_feature_names(cache_path: str) -> List[str]:
+    """Feature names stored in a cache file, or [] for caches in an older layout"""
+    import pyarrow as pa
+
+    try:
+        with pa.memory_map(cache_path) as source:
+            schema = pa.ipc.open_file(source).schema
+    except (OSError, pa.ArrowInvalid):
+        return []
+    if FEATURE_MATRIX_COLUMN not in schema.names:
+        return []
+    return (schema.metadata or {}).get(FEATURE_NAMES_METADATA, b'').decode().split(',')
+
+def load_training_arrays(data_path: str, feature_columns: List[str] = FEATURE_COLUMNS):
+    """Return (X, y) as float32 arrays, rebuilding the feature cache only when the data changed
+
+    With the default feature_columns, X and y are read-only views of the memory-mapped
+    cache file; any other selection or order copies X.
+    """
+    import pyarrow.feather as feather
+
+    cache_path = feature_cache_path(data_path)
+    if (not os.path.exists(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(data_path)
+            or _cached_feature_names(cache_path) != FEATURE_COLUMNS):
+        print(f"Building feature cache {cache_path}...")
+        build_feature_cache(data_path)
+
+    table = feather.read_table(cache_path, memory_map=True).combine_chunks()
+    features = table.column(FEATURE_MATRIX_COLUMN).chunk(0)
+    X = features.values.to_numpy(zero_copy_only=True).reshape(-1, len(FEATURE_COLUMNS))
+    y = table.column(TARGET_COLUMN).chunk(0).to_numpy(zero_copy_only=True)
+    if list(feature_columns) != FEATURE_COLUMNS:
+        X = X[:, [FEATURE_COLUMNS.index(col) for col in feature_columns]]
+    return X, y
@@ -0,0 +1,68 @@
+"""
+Model Export
+Writes serving artifacts for a trained DynamicPricingModel: raw NumPy weights for the
+torch-free runtime, a frozen TorchScript module and (when onnx is installed) an ONNX graph
+"""
+
+import copy
+import os
+from typing import List
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from app.ml.numpy_runtime import NUMPY_WEIGHTS_FILE
+
+TORCHSCRIPT_FILE = "model.torchscript.pt"
+ONNX_FILE = "model.onnx"
+
+def _inference_copy(model: nn.Module) -> nn.Module:
+    """CPU copy in eval mode so exporting never disturbs the model being trained"""
+    return copy.deepcopy(model).cpu().eval()
+
+def export_numpy_weights(model: nn.Module, output_dir: str, scaler=None) -> str:
+    """Save the Linear layer weights (and scaler statistics) as a .npz archive"""
+    linear_layers = [module for module in model.modules() if isinstance(module, nn.Linear)]
+    arrays = {'n_layers': np.array(len(linear_layers))}
+    for i, layer in enumerate(linear_layers):
+        arrays[f'weight_{i}'] = layer.weight.detach().cpu().numpy()
+        arrays[f'bias_{i}'] = layer.bias.detach().cpu().numpy()
+    if scaler is not None:
+        arrays['scaler_mean'] = np.asarray(scaler.mean_, dtype=np.float32)
+        arrays['scaler_scale'] = np.asarray(scaler.scale_, dtype=np.float32)
+    
+    path = os.path.join(output_dir, NUMPY_WEIGHTS_FILE)
+    np.savez(path, **arrays)
+    return path
+
+def export_torchscript(model: nn.Module, output_dir: str) -> str:
+    """Save a frozen TorchScript module"""
+    scripted = torch.jit.freeze(torch.jit.script(_inference_copy(model)))
+    path = os.path.join(output_dir, TORCHSCRIPT_FILE)
+    scripted.save(path)
+    return path
+
+def export_onnx(model: nn.Module, output_dir: str, input_size: int) -> str:
+    """Save an ONNX graph with a dynamic batch dimension"""
+    path = os.path.join(output_dir, ONNX_FILE)
+    torch.onnx.export(
+        _inference_copy(model),
+        torch.zeros(1, input_size),
+        path,
+        input_names=['features'],
+        output_names=['price'],
+        dynamic_axes={'features': {0: 'batch'}, 'price': {0: 'batch'}}
+    )
+    return path
+
+def export_all(model: nn.Module, output_dir: str, input_size: int, scaler=None) -> List[str]:
+    """Write every serving artifact; optional formats that fail are skipped with a warning"""
+    written = [export_numpy_weights(model, output_dir, scaler)]
+    for name, exporter in (('TorchScript', lambda: export_torchscript(model, output_dir)),
+                           ('ONNX', lambda: export_onnx(model, output_dir, input_size))):
+        try:
+            written.append(exporter())
+        except Exception as e:
+            print(f"Warning: {name} export skipped: {e}")
+    return [os.path.basename(path) for path in written]
@@ -0,0 +1,113 @@
+"""
+Versioned Model Registry
+Stores each trained model (weights, scaler, metadata) in its own version directory
+and promotes versions by atomically replacing a "CURRENT" pointer file
+"""
+
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+class ModelRegistry:
+    WEIGHTS_FILE = "model.pth"
+    SCALER_FILE = "scaler.pkl"
+    METADATA_FILE = "metadata.json"
+    POINTER_FILE = "CURRENT"
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.MODEL_REGISTRY_DIR
+        self.versions_dir = os.path.join(self.root, "versions")
+        self.pointer_path = os.path.join(self.root, self.POINTER_FILE)
+
+    def version_path(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version)
+
+    def list_versions(self) -> List[str]:
+        """List published versions, oldest first"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.versions_dir)
+            if not name.startswith('.')
+        )
+
+    def current_version(self) -> Optional[str]:
+        """Version the CURRENT pointer refers to, or None if nothing is promoted"""
+        try:
+            with open(self.pointer_path) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def publish(self, state_dict, metadata: Dict, scaler=None, promote: bool = True,
+                exporter: Optional[Callable[[str], List[str]]] = None) -> str:
+        """Write a new model version and optionally promote it to current
+
+        Files are written into a hidden staging directory which is renamed into
+        place in one step, so readers only ever see complete versions. exporter,
+        if given, writes extra serving artifacts into that directory and returns
+        their file names.
+        """
+        import torch
+        import joblib
+
+        version = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        staging_dir = os.path.join(self.versions_dir, f".staging-{version}")
+        os.makedirs(staging_dir)
+        try:
+            torch.save(state_dict, os.path.join(staging_dir, self.WEIGHTS_FILE))
+            artifacts = [self.WEIGHTS_FILE]
+            if scaler is not None:
+                joblib.dump(scaler, os.path.join(staging_dir, self.SCALER_FILE))
+                artifacts.append(self.SCALER_FILE)
+            if exporter is not None:
+                artifacts.extend(exporter(staging_dir))
+            with open(os.path.join(staging_dir, self.METADATA_FILE), 'w') as f:
+                json.dump({**metadata, 'version': version, 'artifacts': artifacts},
+                          f, indent=2, default=float)
+            os.replace(staging_dir, self.version_path(version))
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        if promote:
+            self.promote(version)
+        return version
+
+    def promote(self, version: str):
+        """Atomically point CURRENT at an existing version"""
+        if not os.path.isdir(self.version_path(version)):
+            raise FileNotFoundError(f"Model version {version} not found in {self.versions_dir}")
+        tmp_path = f"{self.pointer_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, self.pointer_path)
+
+    def load_metadata(self, version: str) -> Dict:
+        path = os.path.join(self.version_path(version), self.METADATA_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def artifact_path(self, version: str, file_name: str) -> Optional[str]:
+        """Path of an artifact inside a version, or None if that version lacks it"""
+        path = os.path.join(self.version_path(version), file_name)
+        return path if os.path.exists(path) else None
+
+    def load(self, version: str):
+        """Load (state_dict, scaler, metadata) for a version; scaler is None if not stored"""
+        import torch
+        import joblib
+
+        version_dir = self.version_path(version)
+        state_dict = torch.load(os.path.join(version_dir, self.WEIGHTS_FILE), map_location='cpu')
+        scaler_path = os.path.join(version_dir, self.SCALER_FILE)
+        scaler = joblib.load(scaler_path) if os.path.exists(scaler_path) else None
+        return state_dict, scaler, self.load_metadata(version)
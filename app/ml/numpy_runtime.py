@@ -0,0 +1,47 @@
+"""
+NumPy Inference Runtime
+Evaluates the exported DynamicPricingModel MLP with plain matmuls so API workers
+can serve predictions without importing torch
+"""
+
+import numpy as np
+from typing import List, Optional, Tuple
+
+NUMPY_WEIGHTS_FILE = "model.npz"
+
+class NumpyPricingModel:
+    """Inference-only copy of DynamicPricingModel: Linear layers with ReLU between them"""
+    
+    def __init__(self, layers: List[Tuple[np.ndarray, np.ndarray]],
+                 scaler_mean: Optional[np.ndarray] = None,
+                 scaler_scale: Optional[np.ndarray] = None):
+        # Store W transposed and contiguous so the forward pass is x @ W + b
+        self.layers = [
+            (np.ascontiguousarray(weight.T, dtype=np.float32), bias.astype(np.float32))
+            for weight, bias in layers
+        ]
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+        self.input_size = self.layers[0][0].shape[0]
+    
+    @classmethod
+    def from_npz(cls, path: str) -> "NumpyPricingModel":
+        with np.load(path) as data:
+            n_layers = int(data['n_layers'])
+            layers = [(data[f'weight_{i}'], data[f'bias_{i}']) for i in range(n_layers)]
+            scaler_mean = data['scaler_mean'] if 'scaler_mean' in data else None
+            scaler_scale = data['scaler_scale'] if 'scaler_scale' in data else None
+        return cls(layers, scaler_mean, scaler_scale)
+    
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Predict prices for a (n, input_size) feature matrix"""
+        hidden = np.asarray(features, dtype=np.float32)
+        if self.scaler_mean is not None:
+            hidden = (hidden - self.scaler_mean) / self.scaler_scale
+        
+        last = len(self.layers) - 1
+        for i, (weight, bias) in enumerate(self.layers):
+            hidden = hidden @ weight + bias
+            if i < last:
+                np.maximum(hidden, 0.0, out=hidden)
+        return hidden.reshape(-1).astype(np.float64)
@@ -0,0 +1,98 @@
+"""
+Prediction Cache
+LRU/TTL cache of model outputs keyed by model version and a quantized feature vector,
+so repricing runs skip the forward pass for products whose inputs have not changed
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+class PredictionCache:
+    def __init__(self, max_size: int, ttl_seconds: float, decimals: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.decimals = decimals
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def keys_for(self, features: np.ndarray) -> List[bytes]:
+        """One key per row: the row rounded to `decimals` places, as raw bytes"""
+        # Adding 0.0 turns -0.0 into 0.0 so both round to the same key
+        quantized = np.round(np.asarray(features, dtype=np.float64), self.decimals) + 0.0
+        return [row.tobytes() for row in quantized]
+    
+    def _sync_version(self, version: str):
+        # A newly promoted model invalidates everything cached for the old one
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+    
+    def get_many(self, version: str, keys: Sequence[bytes]) -> List[Optional[float]]:
+        now = time.monotonic()
+        results: List[Optional[float]] = []
+        with self._lock:
+            self._sync_version(version)
+            for key in keys:
+                entry = self._entries.get((version, key))
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end((version, key))
+                    results.append(entry[0])
+                    self.hits += 1
+                else:
+                    if entry is not None:
+                        del self._entries[(version, key)]
+                    results.append(None)
+                    self.misses += 1
+        return results
+    
+    def put_many(self, version: str, keys: Sequence[bytes], prices: Sequence[float]):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._sync_version(version)
+            for key, price in zip(keys, prices):
+                self._entries[(version, key)] = (float(price), expires_at)
+                self._entries.move_to_end((version, key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_version": self._version,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+_shared_cache: Optional[PredictionCache] = None
+_shared_cache_lock = threading.Lock()
+
+def get_shared_prediction_cache() -> Optional[PredictionCache]:
+    """Process-wide cache shared by every engine, or None when disabled"""
+    global _shared_cache
+    if settings.PREDICTION_CACHE_SIZE <= 0:
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = PredictionCache(
+                settings.PREDICTION_CACHE_SIZE,
+                settings.PREDICTION_CACHE_TTL_SECONDS,
+                settings.PREDICTION_CACHE_DECIMALS
+            )
+        return _shared_cache
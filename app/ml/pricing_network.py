@@ -0,0 +1,35 @@
+import numpy as np
+import torch
+import torch.nn as nn
+from typing import Callable, Optional
+
+class DynamicPricingModel(nn.Module):
+    def __init__(self, input_size: int, hidden_size: int = 128):
+        super(DynamicPricingModel, self).__init__()
+        self.network = nn.Sequential(
+            nn.Linear(input_size, hidden_size),
+            nn.ReLU(),
+            nn.Dropout(0.2),
+            nn.Linear(hidden_size, hidden_size // 2),
+            nn.ReLU(),
+            nn.Dropout(0.2),
+            nn.Linear(hidden_size // 2, hidden_size // 4),
+            nn.ReLU(),
+            nn.Linear(hidden_size // 4, 1)
+        )
+        
+    def forward(self, x):
+        return self.network(x)
+
+def make_torch_predictor(model: DynamicPricingModel, scaler=None) -> Callable[[np.ndarray], np.ndarray]:
+    """Wrap a torch model (and optional fitted scaler) as a features -> prices function"""
+    model.eval()
+    
+    def predict(features: np.ndarray) -> np.ndarray:
+        if scaler is not None:
+            features = scaler.transform(features)
+        with torch.no_grad():
+            predictions = model(torch.FloatTensor(features))
+        return predictions.numpy().reshape(-1).astype(np.float64)
+    
+    return predict
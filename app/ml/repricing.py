@@ -0,0 +1,85 @@
+"""
+Catalog Repricing
+Walks every active product by id in chunks, predicts new prices for each chunk with one
+batched forward pass and writes them back with a single executemany UPDATE per chunk
+"""
+
+import datetime
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.ml.dynamic_pricing_model import DynamicPricingEngine
+from app.models.product import Product
+
+def reprice_active_products(chunk_size: int = settings.REPRICING_CHUNK_SIZE,
+                            pricing_engine: Optional[DynamicPricingEngine] = None) -> int:
+    """Reprice all active products in keyset-paginated chunks, committing per chunk"""
+    if pricing_engine is None:
+        pricing_engine = DynamicPricingEngine()
+        pricing_engine.load_model()
+    seasonality_factor = pricing_engine.calculate_seasonality_factor(datetime.datetime.now().month)
+    
+    db: Session = SessionLocal()
+    updated_count = 0
+    processed_count = 0
+    last_id = 0
+    started = time.perf_counter()
+    try:
+        while True:
+            # Only pull the columns the model needs so memory stays bounded by chunk_size
+            rows = db.query(Product.id, Product.base_price, Product.stock_quantity).filter(
+                Product.is_active == True,
+                Product.id > last_id
+            ).order_by(Product.id).limit(chunk_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            
+            product_ids = np.array([row.id for row in rows], dtype=np.int64)
+            base_prices = np.array([row.base_price or 0.0 for row in rows], dtype=np.float64)
+            stock_levels = np.array([row.stock_quantity or 0 for row in rows], dtype=np.float64)
+            
+            features = pd.DataFrame({
+                'base_price': base_prices,
+                'competitor_avg_price': base_prices,
+                'demand_score': 1.0,
+                'stock_level': stock_levels,
+                'seasonality_factor': seasonality_factor,
+                'user_engagement': 1.0,
+                'conversion_rate': 1.0,
+                'time_since_last_price_change': 1.0
+            })
+            new_prices = pricing_engine.predict_batch(features)
+            
+            valid = new_prices > 0
+            updates = [
+                {"id": int(product_id), "current_price": float(price)}
+                for product_id, price in zip(product_ids[valid], new_prices[valid])
+            ]
+            if updates:
+                # Bulk UPDATE ... WHERE id = :id executed as a single executemany
+                db.execute(update(Product), updates)
+            db.commit()
+            
+            updated_count += len(updates)
+            processed_count += len(rows)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    
+    elapsed = time.perf_counter() - started
+    rate = processed_count / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Repriced {processed_count} products ({updated_count} updated) "
+        f"in {elapsed:.2f}s, {rate:.0f} rows/sec"
+    )
+    return updated_count
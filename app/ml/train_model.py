@@ -14,61 +14,48 @@ import json
 import os
 import sys
 from datetime import datetime
+from typing import Dict, NamedTuple
 import matplotlib.pyplot as plt
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 
-# Add the parent directory to the path to import the model
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add the project root to the path so the app package imports when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-# Import the model from the same directory
-from dynamic_pricing_model import DynamicPricingModel, DynamicPricingEngine
+from app.core.config import settings
+from app.ml.pricing_network import DynamicPricingModel
+from app.ml.model_export import export_all
+from app.ml.model_registry import ModelRegistry
+from app.ml.features import FEATURE_COLUMNS, add_training_features, load_training_arrays
+from app.ml.dynamic_pricing_model import missing_serving_features
+
+TRAINING_HISTORY_FILE = 'training_history.png'
+
+class TrainingResult(NamedTuple):
+    model: object
+    metrics: Dict[str, float]
+    version: str
+    promoted: bool  # False when the pricing engine could not serve the model
 
 class ModelTrainer:
-    def __init__(self, model_path: str = "app/ml/models/dynamic_pricing_model.pth"):
-        self.model_path = model_path
+    def __init__(self):
+        self.registry = ModelRegistry()
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         print(f"Using device: {self.device}")
         
     def load_data(self, data_path: str = "data/amazon_processed_data.csv"):
-        """Load processed training data from Amazon dataset"""
+        """Load processed training data from Amazon dataset
+        
+        data_path may be CSV, Parquet or Feather. Features are computed once and cached
+        next to the data as a float32 Arrow file, which later runs memory-map directly.
+        """
         print("Loading Amazon training data...")
         
         if not os.path.exists(data_path):
             raise FileNotFoundError(f"Amazon processed data not found at {data_path}")
         
-        df = pd.read_csv(data_path)
-        print(f"Loaded Amazon dataset with shape: {df.shape}")
-        
-        # Process features for Amazon data
-        df = self.process_amazon_features(df)
-        
-        # Select features and target
-        feature_columns = [
-            'price_log', 'title_length', 'word_count', 'category_encoded',
-            'cat_mean_price', 'cat_std_price', 'price_percentile',
-            'views', 'add_to_cart', 'purchases', 'conversion_rate',
-            'stock_percentage', 'competitor_price', 'price_ratio', 'month'
-        ]
-        
-        # Ensure all required columns exist
-        for col in feature_columns:
-            if col not in df.columns:
-                print(f"Warning: Column {col} not found, adding default values")
-                if col == 'price_log':
-                    df[col] = np.log(df['price'] + 1)
-                elif col == 'category_encoded':
-                    df[col] = pd.Categorical(df['category']).codes
-                elif col == 'conversion_rate':
-                    df[col] = df['purchases'] / df['views'].replace(0, 1)
-                elif col == 'stock_percentage':
-                    df[col] = df['stock_quantity'] / df['stock_quantity'].max()
-                elif col == 'price_ratio':
-                    df[col] = df['price'] / df['competitor_price'].replace(0, 1)
-                else:
-                    df[col] = 0.0
-        
-        X = df[feature_columns].values
-        y = df['optimal_price'].values
+        feature_columns = list(FEATURE_COLUMNS)
+        X, y = load_training_arrays(data_path, feature_columns)
+        print(f"Loaded Amazon dataset with shape: {X.shape}")
         
         # Split data
         from sklearn.model_selection import train_test_split
@@ -84,31 +71,7 @@ class ModelTrainer:
     def process_amazon_features(self, df):
         """Process Amazon dataset features"""
         print("Processing Amazon dataset features...")
-        
-        # Category encoding
-        df['category_encoded'] = pd.Categorical(df['category']).codes
-        
-        # Price features
-        df['price_log'] = np.log(df['price'] + 1)
-        
-        # Category statistics
-        cat_stats = df.groupby('category').agg({
-            'price': ['mean', 'std']
-        }).reset_index()
-        cat_stats.columns = ['category', 'cat_mean_price', 'cat_std_price']
-        
-        df = df.merge(cat_stats, on='category', how='left')
-        df['cat_std_price'] = df['cat_std_price'].fillna(df['cat_std_price'].mean())
-        
-        # Price percentile
-        df['price_percentile'] = df.groupby('category')['price'].rank(pct=True)
-        
-        # Derived features
-        df['conversion_rate'] = df['purchases'] / df['views'].replace(0, 1)
-        df['stock_percentage'] = df['stock_quantity'] / df['stock_quantity'].max()
-        df['price_ratio'] = df['price'] / df['competitor_price'].replace(0, 1)
-        
-        return df
+        return add_training_features(df)
     
     def create_data_loaders(self, X_train, X_test, y_train, y_test, batch_size=32):
         """Create PyTorch data loaders"""
@@ -128,8 +91,13 @@ class ModelTrainer:
         
         return train_loader, test_loader
     
-    def train_model(self, train_loader, test_loader, input_size, epochs=100, lr=0.001):
-        """Train the dynamic pricing model"""
+    def train_model(self, train_loader, test_loader, input_size, epochs=100, lr=0.001,
+                    progress_callback=None):
+        """Train the dynamic pricing model
+        
+        progress_callback, if given, is called after every epoch with
+        (epoch, epochs, train_loss, test_loss).
+        """
         print("Initializing model...")
         
         # Initialize model
@@ -187,6 +155,9 @@ class ModelTrainer:
             # Update learning rate
             scheduler.step(avg_test_loss)
             
+            if progress_callback is not None:
+                progress_callback(epoch + 1, epochs, avg_train_loss, avg_test_loss)
+            
             # Print progress
             if epoch % 10 == 0:
                 print(f"Epoch {epoch}/{epochs}")
@@ -221,32 +192,43 @@ class ModelTrainer:
             'mape': mape
         }
     
-    def save_model(self, model, feature_columns, metrics, model_path=None):
-        """Save the trained model and metadata"""
-        if model_path is None:
-            model_path = self.model_path
-        
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(model_path), exist_ok=True)
-        
-        # Save model
-        torch.save(model.state_dict(), model_path)
+    def save_model(self, model, feature_columns, metrics, promote=True, history=None):
+        """Publish the trained model and metadata as a new registry version
+        
+        Returns (version, promoted). history, if given, is (train_losses, test_losses)
+        and is plotted into the version before it is published.
+        """
+        missing = missing_serving_features(feature_columns)
+        if promote and missing:
+            # The serving engine would refuse it anyway; keep the current model live
+            print(f"Not promoting: the pricing engine does not supply features {', '.join(missing)}")
+            promote = False
         
-        # Save metadata
         metadata = {
             'feature_columns': feature_columns,
             'model_architecture': 'DynamicPricingModel',
             'training_date': datetime.now().isoformat(),
-            'metrics': metrics,
+            'metrics': {name: float(value) for name, value in metrics.items()},
             'device_used': str(self.device)
         }
         
-        metadata_path = model_path.replace('.pth', '_metadata.json')
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
-        
-        print(f"Model saved to {model_path}")
-        print(f"Metadata saved to {metadata_path}")
+        # Weights are written to a staging directory and renamed into place, then
+        # CURRENT is swapped atomically, so serving processes never see a partial model.
+        # NumPy weights, TorchScript and ONNX exports are staged alongside them.
+        def export(output_dir):
+            artifacts = export_all(model, output_dir, input_size=len(feature_columns))
+            if history is not None:
+                self.plot_training_history(*history, os.path.join(output_dir, TRAINING_HISTORY_FILE))
+                artifacts.append(TRAINING_HISTORY_FILE)
+            return artifacts
+        
+        model_state = {name: tensor.cpu() for name, tensor in model.state_dict().items()}
+        version = self.registry.publish(model_state, metadata, promote=promote, exporter=export)
+        
+        print(f"Model version {version} saved to {self.registry.version_path(version)}")
+        if promote:
+            print(f"Model version {version} promoted to current")
+        return version, promote
     
     def plot_training_history(self, train_losses, test_losses, save_path=None):
         """Plot training history"""
@@ -261,6 +243,7 @@ class ModelTrainer:
         
         if save_path:
             plt.savefig(save_path)
+            plt.close()
             print(f"Training history plot saved to {save_path}")
         else:
             plt.show()
@@ -289,7 +272,7 @@ class ModelTrainer:
         
         return metrics
     
-    def train(self, data_path: str = "data/amazon_processed_data.csv"):
+    def train(self, data_path: str = settings.TRAINING_DATA_PATH, progress_callback=None) -> TrainingResult:
         """Main training pipeline"""
         print("Starting model training pipeline...")
         
@@ -301,33 +284,36 @@ class ModelTrainer:
         
         # Train model
         model, train_losses, test_losses, metrics = self.train_model(
-            train_loader, test_loader, input_size=len(feature_columns)
+            train_loader, test_loader, input_size=len(feature_columns),
+            progress_callback=progress_callback
         )
         
-        # Save model
-        self.save_model(model, feature_columns, metrics)
-        
-        # Plot training history
-        plot_path = self.model_path.replace('.pth', '_training_history.png')
-        self.plot_training_history(train_losses, test_losses, plot_path)
+        # Save model, with its training history plot
+        version, promoted = self.save_model(model, feature_columns, metrics, history=(train_losses, test_losses))
         
         # Evaluate model
         final_metrics = self.evaluate_model(model, test_loader)
         
-        print("Training completed successfully!")
-        return model, final_metrics
+        if promoted:
+            print("Training completed successfully!")
+        else:
+            print(f"Warning: training completed but version {version} was not promoted; the current model keeps serving")
+        return TrainingResult(model, final_metrics, version, promoted)
 
 def main():
     """Main function to run the training"""
     trainer = ModelTrainer()
     
     try:
-        model, metrics = trainer.train()
-        print("Model training completed successfully!")
-        print(f"Final R² Score: {metrics['r2']:.4f}")
+        result = trainer.train()
+        if result.promoted:
+            print("Model training completed successfully!")
+        else:
+            print(f"Model version {result.version} was trained but not promoted")
+        print(f"Final R² Score: {result.metrics['r2']:.4f}")
     except Exception as e:
         print(f"Error during training: {e}")
-        print("Please ensure the processed data is available at data/amazon_processed_data.csv")
+        print(f"Please ensure the processed data is available at {settings.TRAINING_DATA_PATH}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""
+Background Training Jobs
+Runs ModelTrainer in a separate process so training never blocks the API event loop
+"""
+
+import json
+import multiprocessing
+import os
+import re
+import threading
+import traceback
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_futures: Dict[str, Future] = {}
+
+def _job_path(job_id: str) -> str:
+    return os.path.join(settings.TRAINING_JOBS_DIR, f"{job_id}.json")
+
+def _write_job(job: Dict):
+    """Write job status atomically so readers never see a half-written file"""
+    os.makedirs(settings.TRAINING_JOBS_DIR, exist_ok=True)
+    path = _job_path(job['job_id'])
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(job, f, indent=2)
+    os.replace(tmp_path, path)
+
+def _run_training_job(job_id: str, data_path: str) -> Dict:
+    """Entry point executed inside the worker process"""
+    # Never try to open a GUI backend from a worker process
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    from app.ml.train_model import ModelTrainer
+
+    job = get_training_job(job_id) or {'job_id': job_id}
+    job.update({
+        'status': 'running',
+        'started_at': datetime.now().isoformat(),
+        'train_losses': [],
+        'test_losses': []
+    })
+    _write_job(job)
+
+    def report_progress(epoch, epochs, train_loss, test_loss):
+        job['epoch'] = epoch
+        job['epochs'] = epochs
+        job['progress'] = round(epoch / epochs, 4)
+        job['train_losses'].append(float(train_loss))
+        job['test_losses'].append(float(test_loss))
+        _write_job(job)
+
+    try:
+        trainer = ModelTrainer()
+        result = trainer.train(data_path, progress_callback=report_progress)
+        job.update({
+            'status': 'completed',
+            'progress': 1.0,
+            'metrics': {name: float(value) for name, value in result.metrics.items()},
+            # An unpromoted version was published but the previous model is still serving
+            'version': result.version,
+            'promoted': result.promoted,
+            'finished_at': datetime.now().isoformat()
+        })
+    except Exception as e:
+        job.update({
+            'status': 'failed',
+            'error': str(e),
+            'traceback': traceback.format_exc(),
+            'finished_at': datetime.now().isoformat()
+        })
+    _write_job(job)
+    return job
+
+def _job_finished(job_id: str, future: Future):
+    """Mark jobs the worker never finished as failed: cancelled at shutdown or lost with a crashed pool"""
+    _futures.pop(job_id, None)
+    if future.cancelled():
+        error = "Cancelled before it started (training pool shut down)"
+    elif future.exception() is not None:
+        error = f"Training worker failed: {future.exception()!r}"
+    else:
+        return
+    job = get_training_job(job_id) or {'job_id': job_id}
+    job.update({
+        'status': 'failed',
+        'error': error,
+        'finished_at': datetime.now().isoformat()
+    })
+    _write_job(job)
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn keeps torch/CUDA state and open DB connections out of the child
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.TRAINING_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+def _discard_executor(executor: ProcessPoolExecutor):
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+def submit_training_job(data_path: Optional[str] = None) -> str:
+    """Queue a model retraining run and return its job id"""
+    data_path = data_path or settings.TRAINING_DATA_PATH
+    job_id = uuid.uuid4().hex
+    _write_job({
+        'job_id': job_id,
+        'status': 'queued',
+        'data_path': data_path,
+        'submitted_at': datetime.now().isoformat(),
+        'progress': 0.0
+    })
+    executor = _get_executor()
+    try:
+        future = executor.submit(_run_training_job, job_id, data_path)
+    except BrokenProcessPool:
+        # A worker died and took the pool with it; start a fresh one
+        _discard_executor(executor)
+        future = _get_executor().submit(_run_training_job, job_id, data_path)
+    _futures[job_id] = future
+    future.add_done_callback(lambda done: _job_finished(job_id, done))
+    return job_id
+
+def get_training_job(job_id: str) -> Optional[Dict]:
+    """Read the latest status of a training job"""
+    if not re.fullmatch(r'[0-9a-f]{32}', job_id):
+        return None
+    try:
+        with open(_job_path(job_id)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def wait_for_training_job(job_id: str, timeout: Optional[float] = None) -> Dict:
+    """Block until a job submitted from this process finishes and return its final status"""
+    future = _futures.get(job_id)
+    if future is not None:
+        return future.result(timeout=timeout)
+    
+    # Already finished (or submitted elsewhere): the status file is the source of truth
+    job = get_training_job(job_id)
+    if job is None:
+        raise KeyError(f"Unknown training job {job_id}")
+    return job
+
+def shutdown_training_pool():
+    """Stop the worker pool, letting a running job finish; queued jobs are marked failed"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, String, Float, Integer, ForeignKey, DateTime, Date, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -38,4 +38,36 @@ class PricingStrategy(BaseModel):
     description = Column(String)
     algorithm_type = Column(String, nullable=False)  # regression, reinforcement_learning
     parameters = Column(String)  # JSON string of model parameters
-    is_active = Column(String, default="true") 
\ No newline at end of file
+    is_active = Column(String, default="true") 
+
+# Daily rollups kept up to date by app/core/rollups.py so analytics never scan raw tables
+
+class DailyRevenueRollup(BaseModel):
+    __tablename__ = "daily_revenue_rollups"
+    __table_args__ = (UniqueConstraint("day", "status", name="uq_daily_revenue_day_status"),)
+    
+    day = Column(Date, nullable=False, index=True)
+    status = Column(String, nullable=False)  # OrderStatus value
+    order_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+class DailyProductSalesRollup(BaseModel):
+    __tablename__ = "daily_product_sales_rollups"
+    __table_args__ = (
+        UniqueConstraint("day", "product_id", "status", name="uq_daily_product_sales_day_product_status"),
+    )
+    
+    day = Column(Date, nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
+    status = Column(String, nullable=False)  # Status of the order the items belong to
+    item_count = Column(Integer, nullable=False, default=0)  # Order lines
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+class DailyPriceChangeRollup(BaseModel):
+    __tablename__ = "daily_price_change_rollups"
+    __table_args__ = (UniqueConstraint("day", "reason", name="uq_daily_price_change_day_reason"),)
+    
+    day = Column(Date, nullable=False, index=True)
+    reason = Column(String, nullable=False)  # PriceHistory.reason, '' when unset
+    change_count = Column(Integer, nullable=False, default=0)
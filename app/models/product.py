@@ -1,9 +1,17 @@
-from sqlalchemy import Column, String, Float, Integer, Text, Boolean, ForeignKey
+from sqlalchemy import Column, String, Float, Integer, Text, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
 class Product(BaseModel):
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pagination of the storefront listing: (sort column, id) behind the usual filters
+        Index("ix_products_active_id", "is_active", "id"),
+        Index("ix_products_active_price_id", "is_active", "current_price", "id"),
+        Index("ix_products_active_category_id", "is_active", "category", "id"),
+        Index("ix_products_active_category_price_id", "is_active", "category", "current_price", "id"),
+        Index("ix_products_active_created_id", "is_active", "created_at", "id"),
+    )
     
     name = Column(String, nullable=False)
     description = Column(Text)
@@ -33,6 +41,10 @@ class PriceHistory(BaseModel):
 
 class CompetitorPrice(BaseModel):
     __tablename__ = "competitor_prices"
+    __table_args__ = (
+        # Latest scrape of a product
+        Index("ix_competitor_prices_product_created", "product_id", "created_at"),
+    )
     
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     competitor_name = Column(String, nullable=False)
@@ -42,6 +54,17 @@ class CompetitorPrice(BaseModel):
     # Relationships
     product = relationship("Product", back_populates="competitor_prices")
 
+class CompetitorScrapeAttempt(BaseModel):
+    """One row per competitor price scrape of a product, including ones that found nothing"""
+    __tablename__ = "competitor_scrape_attempts"
+    __table_args__ = (
+        Index("ix_competitor_scrape_attempts_product_created", "product_id", "created_at"),
+    )
+    
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    prices_found = Column(Integer, default=0)
+    error = Column(String)
+
 # Set relationships that reference models defined elsewhere
 # Product.user_behaviors = relationship("UserBehavior", back_populates="product")
 # Product.demand_metrics = relationship("DemandMetrics", back_populates="product") 
\ No newline at end of file
@@ -0,0 +1,275 @@
+"""
+Catalog Competitor Price Refresh
+Walks every active product whose competitor prices are stale, most urgent first
+(staleness weighted by recent sales velocity), through a bounded pool of scrape
+workers. Progress is checkpointed to disk so an interrupted run resumes where it stopped,
+and a lock file next to the checkpoint keeps concurrent processes from running at once.
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.analytics import DailyProductSalesRollup
+from app.models.order import OrderStatus
+from app.models.product import Product, CompetitorPrice, CompetitorScrapeAttempt
+from app.scrapers.competitor_scraper import CompetitorPriceScraper, PRICE_SELECTORS, competitor_metrics
+from app.scrapers.price_refresh import CompetitorPriceRefresher, scrape_age_seconds
+
+VELOCITY_WINDOW_DAYS = 7
+NAME_LOOKUP_CHUNK = 500
+
+def plan_refresh(db: Session, limit: Optional[int] = None) -> List[int]:
+    """Ids of active products with stale competitor prices, highest priority first"""
+    last_scraped = db.query(
+        CompetitorPrice.product_id.label('product_id'),
+        func.max(CompetitorPrice.created_at).label('last_scraped')
+    ).group_by(CompetitorPrice.product_id).subquery()
+    # Scrapes that found nothing or failed count too, or they would top every run
+    last_attempted = db.query(
+        CompetitorScrapeAttempt.product_id.label('product_id'),
+        func.max(CompetitorScrapeAttempt.created_at).label('last_attempted')
+    ).group_by(CompetitorScrapeAttempt.product_id).subquery()
+
+    since = date.today() - timedelta(days=VELOCITY_WINDOW_DAYS)
+    velocity = db.query(
+        DailyProductSalesRollup.product_id.label('product_id'),
+        func.sum(DailyProductSalesRollup.units).label('units')
+    ).filter(
+        DailyProductSalesRollup.day >= since,
+        DailyProductSalesRollup.status != OrderStatus.CANCELLED.value
+    ).group_by(DailyProductSalesRollup.product_id).subquery()
+
+    rows = db.query(
+        Product.id, last_scraped.c.last_scraped, last_attempted.c.last_attempted, velocity.c.units
+    ).outerjoin(
+        last_scraped, last_scraped.c.product_id == Product.id
+    ).outerjoin(
+        last_attempted, last_attempted.c.product_id == Product.id
+    ).outerjoin(
+        velocity, velocity.c.product_id == Product.id
+    ).filter(Product.is_active == True).all()
+
+    max_age = settings.COMPETITOR_PRICE_MAX_AGE_SECONDS
+    candidates = []
+    for product_id, scraped_at, attempted_at, units in rows:
+        ages = [scrape_age_seconds(at) for at in (scraped_at, attempted_at) if at]
+        # Never-scraped products count as one full refresh interval staler than the limit
+        age = min(ages) if ages else 2 * max_age
+        if age <= max_age:
+            continue
+        units_per_day = (units or 0) / VELOCITY_WINDOW_DAYS
+        candidates.append((age * (1.0 + units_per_day), product_id))
+
+    candidates.sort(reverse=True)
+    ids = [product_id for _, product_id in candidates]
+    return ids[:limit] if limit else ids
+
+def load_checkpoint(path: Optional[str] = None) -> Optional[Dict]:
+    try:
+        with open(path or settings.CATALOG_REFRESH_CHECKPOINT_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def save_checkpoint(checkpoint: Dict, path: Optional[str] = None):
+    """Write the checkpoint atomically so a crash never leaves a truncated file"""
+    path = path or settings.CATALOG_REFRESH_CHECKPOINT_PATH
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def try_lock(f) -> bool:
+    """Take an exclusive lock on an open file without waiting; released when the file is closed"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _competitor_totals() -> Dict[str, Dict[str, float]]:
+    totals = {}
+    for competitor in PRICE_SELECTORS:
+        stats = competitor_metrics(competitor)
+        totals[competitor] = {
+            name: stats[name].value for name in ('requests', 'failures', 'products', 'prices', 'cache_hits', 'revalidated')
+        }
+    return totals
+
+def competitor_stats(start: Dict, end: Dict, elapsed: float) -> Dict[str, Dict]:
+    """Per-competitor throughput and failure rate between two _competitor_totals snapshots"""
+    stats = {}
+    for competitor, totals in end.items():
+        delta = {name: value - start.get(competitor, {}).get(name, 0.0) for name, value in totals.items()}
+        stats[competitor] = {
+            **delta,
+            "requests_per_second": delta['requests'] / elapsed if elapsed > 0 else 0.0,
+            "failure_rate": delta['failures'] / delta['requests'] if delta['requests'] else 0.0
+        }
+    return stats
+
+class CatalogRefreshRun:
+    def __init__(self, refresher: Optional[CompetitorPriceRefresher] = None,
+                 concurrency: Optional[int] = None, checkpoint_path: Optional[str] = None):
+        self.refresher = refresher or CompetitorPriceRefresher()
+        self.scraper: CompetitorPriceScraper = self.refresher.scraper
+        self.concurrency = concurrency or settings.CATALOG_REFRESH_CONCURRENCY
+        self.checkpoint_path = checkpoint_path or settings.CATALOG_REFRESH_CHECKPOINT_PATH
+
+    def run(self, resume: bool = True, limit: Optional[int] = None) -> Optional[Dict]:
+        """Refresh the stale part of the catalog and return the run summary, or None if another process is running one"""
+        lock_path = f"{self.checkpoint_path}.lock"
+        os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+        with open(lock_path, 'a') as lock_file:
+            # Every app worker process schedules this job; only one may own the checkpoint
+            if not try_lock(lock_file):
+                print("Catalog refresh already running in another process; skipping")
+                return None
+            return self._run(resume, limit)
+
+    def _resumable(self, checkpoint: Optional[Dict], limit: Optional[int]) -> bool:
+        """Whether an interrupted run is recent enough to finish instead of planning afresh"""
+        if not checkpoint or checkpoint.get('status') != 'running' or checkpoint.get('limit') != limit:
+            return False
+        try:
+            started_at = datetime.fromisoformat(checkpoint['started_at'])
+        except (KeyError, TypeError, ValueError):
+            return False
+        # Past one interval its queue is stale; plan_refresh already skips what it refreshed
+        return datetime.now() - started_at < timedelta(hours=settings.CATALOG_REFRESH_INTERVAL_HOURS)
+
+    def _run(self, resume: bool, limit: Optional[int]) -> Dict:
+        checkpoint = load_checkpoint(self.checkpoint_path) if resume else None
+        if self._resumable(checkpoint, limit):
+            print(f"Resuming catalog refresh {checkpoint['run_id']} "
+                  f"({len(checkpoint['done'])}/{len(checkpoint['queue'])} done)")
+            # Products that failed are retried
+            checkpoint['failed'] = []
+        else:
+            if self.scraper.http_cache is not None:
+                self.scraper.http_cache.prune()
+            db = SessionLocal()
+            try:
+                queue = plan_refresh(db, limit)
+            finally:
+                db.close()
+            checkpoint = {
+                'run_id': uuid.uuid4().hex,
+                'status': 'running',
+                'started_at': datetime.now().isoformat(),
+                'limit': limit,
+                'queue': queue,
+                'done': [],
+                'failed': []
+            }
+        save_checkpoint(checkpoint, self.checkpoint_path)
+
+        start_totals = _competitor_totals()
+        started = time.perf_counter()
+        processed = asyncio.run(self._process(checkpoint))
+        elapsed = time.perf_counter() - started
+
+        checkpoint['status'] = 'completed'
+        checkpoint['finished_at'] = datetime.now().isoformat()
+        checkpoint['summary'] = {
+            'processed': processed,
+            'remaining': len(checkpoint['queue']) - len(checkpoint['done']) - len(checkpoint['failed']),
+            'failed': len(checkpoint['failed']),
+            'elapsed_seconds': elapsed,
+            'products_per_second': processed / elapsed if elapsed > 0 else 0.0,
+            'competitors': competitor_stats(start_totals, _competitor_totals(), elapsed)
+        }
+        save_checkpoint(checkpoint, self.checkpoint_path)
+        return checkpoint['summary']
+
+    def _products(self, product_ids: List[int]) -> Dict[int, tuple]:
+        db = SessionLocal()
+        try:
+            products = {}
+            for start in range(0, len(product_ids), NAME_LOOKUP_CHUNK):
+                chunk = product_ids[start:start + NAME_LOOKUP_CHUNK]
+                for row in db.query(Product.id, Product.name, Product.category).filter(Product.id.in_(chunk)):
+                    products[row.id] = (str(row.name), str(row.category))
+            return products
+        finally:
+            db.close()
+
+    def _store(self, product_id: int, competitor_prices: List[Dict]):
+        db = SessionLocal()
+        try:
+            self.refresher.store(db, product_id, competitor_prices)
+        finally:
+            db.close()
+
+    def _record_failure(self, product_id: int, error: Exception):
+        db = SessionLocal()
+        try:
+            self.refresher.record_failure(db, product_id, error)
+        finally:
+            db.close()
+
+    async def _process(self, checkpoint: Dict) -> int:
+        finished = set(checkpoint['done'])
+        pending = [product_id for product_id in checkpoint['queue'] if product_id not in finished]
+        products = await asyncio.to_thread(self._products, pending)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for product_id in pending:
+            queue.put_nowait(product_id)
+
+        processed = 0
+        last_saved = time.monotonic()
+
+        async def worker(client):
+            nonlocal processed, last_saved
+            while True:
+                try:
+                    product_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                product = products.get(product_id)
+                # Skip products deleted since planning, or already being refreshed by update-price
+                succeeded = True
+                if product is not None and self.refresher.claim(product_id):
+                    try:
+                        prices = await self.scraper.get_competitor_prices_async(*product, client=client)
+                        await asyncio.to_thread(self._store, product_id, prices)
+                    except Exception as e:
+                        print(f"Error refreshing competitor prices for product {product_id}: {e}")
+                        succeeded = False
+                        await asyncio.to_thread(self._record_failure, product_id, e)
+                    finally:
+                        self.refresher.release(product_id)
+
+                # Failed products stay out of done so a resumed run retries them
+                checkpoint['done' if succeeded else 'failed'].append(product_id)
+                processed += 1
+                if time.monotonic() - last_saved >= settings.CATALOG_REFRESH_CHECKPOINT_SECONDS:
+                    last_saved = time.monotonic()
+                    snapshot = {**checkpoint, 'done': list(checkpoint['done']), 'failed': list(checkpoint['failed'])}
+                    await asyncio.to_thread(save_checkpoint, snapshot, self.checkpoint_path)
+
+        async with self.scraper.make_async_client() as client:
+            await asyncio.gather(*[worker(client) for _ in range(self.concurrency)])
+        return processed
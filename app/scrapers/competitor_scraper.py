@@ -1,201 +1,236 @@
-import requests
-from bs4 import BeautifulSoup
-import time
-import random
+import httpx
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 from urllib.parse import urljoin, urlparse
-import re
+import time
+from app.core import metrics
 from app.core.config import settings
+from app.scrapers.html_parsing import CompetitorParser, extract_price
+from app.scrapers.http_cache import HTTPCache
+from app.scrapers.rate_limit import DomainLimiter
+
+# Price selectors per competitor, tried in order
+PRICE_SELECTORS = {
+    'amazon': [
+        'span.a-price-whole',
+        'span.a-offscreen',
+        'span.a-price span.a-offscreen',
+        '#priceblock_ourprice',
+        '#priceblock_dealprice'
+    ],
+    'ebay': [
+        'span[itemprop="price"]',
+        '.x-price-primary span',
+        '.x-price-original',
+        '.x-price-current'
+    ],
+    'walmart': [
+        'span[data-automation-id="product-price"]',
+        '.price-characteristic',
+        '.price-main',
+        '[data-price-type="finalPrice"]'
+    ]
+}
+
+# Product link selectors on each competitor's search results page
+PRODUCT_LINK_SELECTORS = {
+    'amazon': [
+        'a[href*="/dp/"]',
+        'a[data-component-type="s-search-result"]'
+    ],
+    'ebay': [
+        'a[href*="/itm/"]',
+        '.s-item__link'
+    ],
+    'walmart': [
+        'a[href*="/ip/"]',
+        '.product-title-link'
+    ]
+}
+
+PRODUCT_PAGES_PER_COMPETITOR = 3
+
+# Part of the cache key for parse results; bump when selectors or parsing change
+PARSER_VERSION = 3
+
+FETCH_SECONDS_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
+def competitor_metrics(competitor: str) -> Dict:
+    """Process-wide request, failure and result metrics for one competitor"""
+    prefix = f"scraper_{competitor}"
+    return {
+        'requests': metrics.counter(f"{prefix}_requests_total", f"HTTP requests sent to {competitor}"),
+        'failures': metrics.counter(f"{prefix}_failures_total", f"Failed or non-2xx requests to {competitor}"),
+        'products': metrics.counter(f"{prefix}_products_total", f"Product searches completed on {competitor}"),
+        'prices': metrics.counter(f"{prefix}_prices_total", f"Prices extracted from {competitor}"),
+        'cache_hits': metrics.counter(f"{prefix}_cache_hits_total", f"Pages from {competitor} served from cache without a request"),
+        'revalidated': metrics.counter(f"{prefix}_revalidated_total", f"Cached pages from {competitor} confirmed unchanged by a 304"),
+        'fetch_seconds': metrics.histogram(
+            f"{prefix}_fetch_seconds", FETCH_SECONDS_BUCKETS, f"Request latency to {competitor}"
+        )
+    }
 
 class CompetitorPriceScraper:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': settings.USER_AGENT,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
-        })
+        }
         
-    def scrape_amazon_price(self, product_url: str) -> Optional[float]:
-        """Scrape price from Amazon"""
-        try:
-            response = self.session.get(product_url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Try different price selectors
-            price_selectors = [
-                'span.a-price-whole',
-                'span.a-offscreen',
-                'span.a-price span.a-offscreen',
-                '#priceblock_ourprice',
-                '#priceblock_dealprice'
-            ]
-            
-            for selector in price_selectors:
-                price_element = soup.select_one(selector)
-                if price_element:
-                    price_text = price_element.get_text().strip()
-                    price = self.extract_price(price_text)
-                    if price:
-                        return price
-            
-            return None
-            
-        except Exception as e:
-            print(f"Error scraping Amazon price: {e}")
-            return None
+        # Shared by every scrape in this process so domains are paced across products too;
+        # one product scrape is a search page plus its product pages every SCRAPING_DELAY seconds
+        self.limiter = DomainLimiter(
+            rate_per_second=(1 + PRODUCT_PAGES_PER_COMPETITOR) / max(settings.SCRAPING_DELAY, 0.001),
+            burst=settings.SCRAPER_DOMAIN_BURST,
+            per_domain_concurrency=settings.SCRAPER_DOMAIN_CONCURRENCY,
+            global_concurrency=settings.SCRAPER_GLOBAL_CONCURRENCY
+        )
+        self.http_cache = HTTPCache() if settings.SCRAPER_HTTP_CACHE_DIR else None
+        self.parser = CompetitorParser(PRICE_SELECTORS, PRODUCT_LINK_SELECTORS)
     
-    def scrape_ebay_price(self, product_url: str) -> Optional[float]:
-        """Scrape price from eBay"""
-        try:
-            response = self.session.get(product_url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Try different price selectors for eBay
-            price_selectors = [
-                'span[itemprop="price"]',
-                '.x-price-primary span',
-                '.x-price-original',
-                '.x-price-current'
-            ]
-            
-            for selector in price_selectors:
-                price_element = soup.select_one(selector)
-                if price_element:
-                    price_text = price_element.get_text().strip()
-                    price = self.extract_price(price_text)
-                    if price:
-                        return price
-            
-            return None
-            
-        except Exception as e:
-            print(f"Error scraping eBay price: {e}")
-            return None
+    def parse_price(self, content: bytes, competitor: str) -> Optional[float]:
+        """Find the first parseable price on a competitor product page"""
+        return self.parser.price(content, competitor)
     
-    def scrape_walmart_price(self, product_url: str) -> Optional[float]:
-        """Scrape price from Walmart"""
-        try:
-            response = self.session.get(product_url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Try different price selectors for Walmart
-            price_selectors = [
-                'span[data-automation-id="product-price"]',
-                '.price-characteristic',
-                '.price-main',
-                '[data-price-type="finalPrice"]'
-            ]
-            
-            for selector in price_selectors:
-                price_element = soup.select_one(selector)
-                if price_element:
-                    price_text = price_element.get_text().strip()
-                    price = self.extract_price(price_text)
-                    if price:
-                        return price
-            
-            return None
-            
-        except Exception as e:
-            print(f"Error scraping Walmart price: {e}")
-            return None
+    def parse_product_urls(self, content: bytes, competitor: str) -> List[str]:
+        """Product page URLs from a competitor search results page"""
+        return sorted(set(self._absolute_url(href, competitor) for href in self.parser.links(content, competitor)))
     
     def extract_price(self, price_text: str) -> Optional[float]:
         """Extract numeric price from text"""
-        # Remove currency symbols and extract numbers
-        price_match = re.search(r'[\d,]+\.?\d*', price_text.replace(',', ''))
-        if price_match:
-            try:
-                return float(price_match.group())
-            except ValueError:
-                return None
-        return None
+        return extract_price(price_text)
+    
+    def _absolute_url(self, href: str, competitor: str) -> str:
+        if not href.startswith('http'):
+            return urljoin(f'https://www.{competitor}.com', href)
+        return href
+    
+    def search_urls(self, product_name: str) -> Dict[str, str]:
+        """Search page URL for the product on each competitor"""
+        query = product_name.replace(" ", "+")
+        return {
+            'amazon': f'https://www.amazon.com/s?k={query}',
+            'ebay': f'https://www.ebay.com/sch/i.html?_nkw={query}',
+            'walmart': f'https://www.walmart.com/search?q={query}'
+        }
     
     def get_competitor_prices(self, product_name: str, category: str) -> List[Dict]:
         """Get competitor prices for a product"""
-        competitors = []
+        coroutine = self.get_competitor_prices_async(product_name, category)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
         
-        # Search URLs for different competitors
-        search_urls = {
-            'amazon': f'https://www.amazon.com/s?k={product_name.replace(" ", "+")}',
-            'ebay': f'https://www.ebay.com/sch/i.html?_nkw={product_name.replace(" ", "+")}',
-            'walmart': f'https://www.walmart.com/search?q={product_name.replace(" ", "+")}'
-        }
+        # Called from inside an event loop: run the scrape on its own loop in a worker thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+    
+    def make_async_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers=self.headers,
+            timeout=settings.SCRAPER_TIMEOUT_SECONDS,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=settings.SCRAPER_GLOBAL_CONCURRENCY)
+        )
+    
+    async def get_competitor_prices_async(self, product_name: str, category: str,
+                                          client: Optional[httpx.AsyncClient] = None) -> List[Dict]:
+        """Scrape every competitor concurrently; pacing comes from the per-domain limiter"""
+        if client is None:
+            async with self.make_async_client() as client:
+                return await self.get_competitor_prices_async(product_name, category, client)
         
-        for competitor, search_url in search_urls.items():
+        results = await asyncio.gather(*[
+            self._scrape_competitor(client, competitor, search_url)
+            for competitor, search_url in self.search_urls(product_name).items()
+        ])
+        return [price for competitor_prices in results for price in competitor_prices]
+    
+    async def _fetch(self, client: httpx.AsyncClient, url: str, competitor: str,
+                     headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        stats = competitor_metrics(competitor)
+        async with self.limiter.slot(url):
+            started = time.perf_counter()
+            stats['requests'].inc()
             try:
-                # Add delay to be respectful
-                time.sleep(random.uniform(1, 3))
-                
-                response = self.session.get(search_url, timeout=10)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Extract product URLs (simplified - in real implementation, you'd need more sophisticated parsing)
-                product_urls = self.extract_product_urls(soup, competitor)
-                
-                for url in product_urls[:3]:  # Limit to first 3 results
-                    price = None
-                    if competitor == 'amazon':
-                        price = self.scrape_amazon_price(url)
-                    elif competitor == 'ebay':
-                        price = self.scrape_ebay_price(url)
-                    elif competitor == 'walmart':
-                        price = self.scrape_walmart_price(url)
-                    
-                    if price:
-                        competitors.append({
-                            'competitor': competitor,
-                            'price': price,
-                            'url': url
-                        })
-                        
-            except Exception as e:
-                print(f"Error getting {competitor} prices: {e}")
-                continue
-        
-        return competitors
+                response = await client.get(url, headers=headers)
+                # A 304 to a conditional request means the cached page is current; to any
+                # other request it has no body to use, so it is an error like any other non-200
+                if response.status_code != 304 or not headers:
+                    response.raise_for_status()
+            except Exception:
+                stats['failures'].inc()
+                raise
+            finally:
+                stats['fetch_seconds'].observe(time.perf_counter() - started)
+        return response
     
-    def extract_product_urls(self, soup: BeautifulSoup, competitor: str) -> List[str]:
-        """Extract product URLs from search results"""
-        urls = []
+    async def _fetch_parsed(self, client: httpx.AsyncClient, url: str, competitor: str,
+                            kind: str, parse):
+        """parse(content, competitor) for a page, skipping the request and the parse while the page is unchanged"""
+        if self.http_cache is None:
+            response = await self._fetch(client, url, competitor)
+            return parse(response.content, competitor)
         
-        if competitor == 'amazon':
-            # Amazon product link selectors
-            selectors = [
-                'a[href*="/dp/"]',
-                'a[data-component-type="s-search-result"]'
-            ]
-        elif competitor == 'ebay':
-            # eBay product link selectors
-            selectors = [
-                'a[href*="/itm/"]',
-                '.s-item__link'
-            ]
-        elif competitor == 'walmart':
-            # Walmart product link selectors
-            selectors = [
-                'a[href*="/ip/"]',
-                '.product-title-link'
-            ]
+        stats = competitor_metrics(competitor)
+        entry = await asyncio.to_thread(self.http_cache.get, url)
+        if entry is not None and self.http_cache.is_fresh(entry, competitor):
+            stats['cache_hits'].inc()
+        else:
+            response = await self._fetch(client, url, competitor, entry.conditional_headers() if entry else None)
+            if response.status_code == 304:
+                try:
+                    await asyncio.to_thread(lambda: entry.body)
+                    stats['revalidated'].inc()
+                    entry = await asyncio.to_thread(self.http_cache.revalidated, entry, response.headers)
+                except FileNotFoundError:
+                    # Pruned since the lookup: the 304 confirms a page we no longer have
+                    response = await self._fetch(client, url, competitor)
+            if response.status_code != 304:
+                entry = await asyncio.to_thread(self.http_cache.store, url, response.content, response.headers)
         
-        for selector in selectors:
-            links = soup.select(selector)
-            for link in links:
-                href = link.get('href')
-                if href and isinstance(href, str):
-                    if not href.startswith('http'):
-                        href = urljoin(f'https://www.{competitor}.com', href)
-                    urls.append(href)
+        key = f"{kind}:v{PARSER_VERSION}"
+        cached = entry.parsed(key)
+        if cached is not None:
+            return cached['value']
+        value = parse(await asyncio.to_thread(lambda: entry.body), competitor)
+        await asyncio.to_thread(self.http_cache.store_parsed, entry, key, value)
+        return value
+    
+    async def _scrape_competitor(self, client: httpx.AsyncClient, competitor: str,
+                                 search_url: str) -> List[Dict]:
+        try:
+            # Extract product URLs (simplified - in real implementation, you'd need more sophisticated parsing)
+            product_urls = await self._fetch_parsed(
+                client, search_url, competitor, 'product_urls', self.parse_product_urls
+            )
+            product_urls = product_urls[:PRODUCT_PAGES_PER_COMPETITOR]
+            prices = await asyncio.gather(*[
+                self._scrape_price_async(client, url, competitor) for url in product_urls
+            ])
+        except Exception as e:
+            print(f"Error getting {competitor} prices: {e}")
+            return []
         
-        return list(set(urls))  # Remove duplicates 
\ No newline at end of file
+        found = [
+            {'competitor': competitor, 'price': price, 'url': url}
+            for url, price in zip(product_urls, prices)
+            if price
+        ]
+        stats = competitor_metrics(competitor)
+        stats['products'].inc()
+        stats['prices'].inc(len(found))
+        return found
+    
+    async def _scrape_price_async(self, client: httpx.AsyncClient, product_url: str,
+                                  competitor: str) -> Optional[float]:
+        try:
+            return await self._fetch_parsed(client, product_url, competitor, 'price', self.parse_price)
+        except Exception as e:
+            print(f"Error scraping {competitor} price: {e}")
+            return None
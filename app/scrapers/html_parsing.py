@@ -0,0 +1,252 @@
+"""
+Competitor Page Parsing
+Pluggable HTML parser backends (selectolax, lxml, BeautifulSoup) with selectors
+compiled once per competitor, and a byte-level fast path that reads a price
+straight out of the raw page when a known price marker is found.
+"""
+
+import re
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from app.core.config import settings
+
+def extract_price(price_text: str) -> Optional[float]:
+    """Extract numeric price from text"""
+    # Remove currency symbols and extract numbers
+    price_match = re.search(r'[\d,]+\.?\d*', price_text.replace(',', ''))
+    if price_match:
+        try:
+            return float(price_match.group())
+        except ValueError:
+            return None
+    return None
+
+class SelectolaxBackend:
+    """Lexbor (C) parser; it compiles selectors internally, so they stay strings"""
+    name = 'selectolax'
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def compile(self, selector: str):
+        return selector
+
+    def parse(self, content: bytes):
+        return self._parser(content)
+
+    def first_text(self, tree, selector) -> Optional[str]:
+        node = tree.css_first(selector)
+        return node.text() if node is not None else None
+
+    def attributes(self, tree, selector, attribute: str) -> List[Optional[str]]:
+        return [node.attributes.get(attribute) for node in tree.css(selector)]
+
+class LxmlBackend:
+    """libxml2 parser with selectors translated to compiled XPath once"""
+    name = 'lxml'
+
+    def __init__(self):
+        import lxml.html
+        from lxml import etree
+        from cssselect import HTMLTranslator
+        self._html = lxml.html
+        self._etree = etree
+        self._translator = HTMLTranslator()
+
+    def compile(self, selector: str):
+        return self._etree.XPath(self._translator.css_to_xpath(selector))
+
+    def parse(self, content: bytes):
+        try:
+            return self._html.document_fromstring(content)
+        except self._etree.ParserError:
+            # Empty or whitespace-only documents
+            return self._html.document_fromstring(b'<html></html>')
+
+    def first_text(self, tree, selector) -> Optional[str]:
+        elements = selector(tree)
+        return elements[0].text_content() if elements else None
+
+    def attributes(self, tree, selector, attribute: str) -> List[Optional[str]]:
+        return [element.get(attribute) for element in selector(tree)]
+
+class SoupBackend:
+    """Pure Python BeautifulSoup tree with soupsieve selectors compiled once"""
+    name = 'bs4'
+
+    def __init__(self):
+        import soupsieve
+        from bs4 import BeautifulSoup
+        self._soupsieve = soupsieve
+        self._soup = BeautifulSoup
+
+    def compile(self, selector: str):
+        return self._soupsieve.compile(selector)
+
+    def parse(self, content: bytes):
+        return self._soup(content, 'html.parser')
+
+    def first_text(self, tree, selector) -> Optional[str]:
+        element = selector.select_one(tree)
+        return element.get_text() if element is not None else None
+
+    def attributes(self, tree, selector, attribute: str) -> List[Optional[str]]:
+        values = [element.get(attribute) for element in selector.select(tree)]
+        return [value if isinstance(value, str) else None for value in values]
+
+PARSER_BACKENDS = {
+    'selectolax': SelectolaxBackend,
+    'lxml': LxmlBackend,
+    'bs4': SoupBackend
+}
+
+def get_backend(name: Optional[str] = None):
+    """Backend by name; 'auto' picks the fastest one installed"""
+    name = name or settings.SCRAPER_PARSER_BACKEND
+    if name != 'auto':
+        if name not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown parser backend {name}; expected auto or one of {sorted(PARSER_BACKENDS)}")
+        return PARSER_BACKENDS[name]()
+    for backend in PARSER_BACKENDS.values():
+        try:
+            return backend()
+        except ImportError:
+            continue
+    raise ImportError("No HTML parser backend is installed")
+
+# tag, then any number of .class, #id or [attr="value"] qualifiers
+_SIMPLE_SELECTOR = re.compile(r'^([a-zA-Z][\w-]*)?((?:\.[\w-]+|#[\w-]+|\[[\w-]+="[^"]*"\])+)$')
+_QUALIFIER = re.compile(r'\.([\w-]+)|#([\w-]+)|\[([\w-]+)="([^"]*)"\]')
+
+# An opening tag with its attributes; quoted values may contain '>'
+_ATTRIBUTE = rb'([^\s"\'>/=]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'=<>`]+)))?'
+_OPEN_TAG = re.compile(rb'<([a-zA-Z][\w-]*)((?:\s+' + _ATTRIBUTE + rb')*)\s*/?>')
+_ATTRIBUTES = re.compile(_ATTRIBUTE)
+# Markup in these is text to every HTML parser, never elements
+_RAW_TEXT = re.compile(rb'<!--.*?(?:-->|\Z)|<(script|style)\b.*?(?:</\1\s*>|\Z)', re.IGNORECASE | re.DOTALL)
+
+class PriceMarker:
+    """Finds opening tags matching a single-element selector in raw HTML bytes"""
+
+    def __init__(self, needle: bytes, tag: Optional[str], qualifiers: List[tuple]):
+        self.needle = needle
+        self.tag = tag.lower().encode() if tag else None
+        self.classes = [class_name.encode() for class_name, _, _, _ in qualifiers if class_name]
+        self.attributes = [(b'id', element_id.encode()) for _, element_id, _, _ in qualifiers if element_id]
+        self.attributes += [
+            (attribute.lower().encode(), value.encode())
+            for class_name, element_id, attribute, value in qualifiers if attribute
+        ]
+
+    def matches(self, tag: bytes, attribute_text: bytes) -> bool:
+        if self.tag is not None and tag.lower() != self.tag:
+            return False
+        attributes = {}
+        for name, double_quoted, single_quoted, unquoted in _ATTRIBUTES.findall(attribute_text):
+            # Browsers keep the first of duplicated attributes
+            attributes.setdefault(name.lower(), double_quoted or single_quoted or unquoted)
+        classes = attributes.get(b'class', b'').split()
+        return (all(class_name in classes for class_name in self.classes)
+                and all(attributes.get(name) == value for name, value in self.attributes))
+
+    def candidates(self, content: bytes) -> Iterator[re.Match]:
+        """Matching opening tags in document order, including any inside comments or scripts"""
+        # Scan for the literal needle at C speed and only parse the tags containing it
+        position = content.find(self.needle)
+        while position >= 0:
+            start = content.rfind(b'<', 0, position)
+            match = _OPEN_TAG.match(content, start) if start >= 0 else None
+            if match is not None and match.end() > position and self.matches(match.group(1), match.group(2)):
+                yield match
+                position = match.end() - 1
+            position = content.find(self.needle, position + 1)
+
+def price_marker(selector: str) -> Optional[PriceMarker]:
+    """Marker for elements matching a single-element selector, else None"""
+    match = _SIMPLE_SELECTOR.match(selector)
+    if not match:
+        return None
+    tag, qualifier_text = match.groups()
+    qualifiers = _QUALIFIER.findall(qualifier_text)
+    # The longest class, id or attribute value is the rarest literal to scan for
+    needle = max((class_name or element_id or value for class_name, element_id, _, value in qualifiers), key=len)
+    if not needle:
+        return None
+    return PriceMarker(needle.encode(), tag, qualifiers)
+
+class CompetitorParser:
+    """Price and product link extraction with every competitor's selectors compiled up front"""
+
+    def __init__(self, price_selectors: Dict[str, Sequence[str]], link_selectors: Dict[str, Sequence[str]],
+                 backend=None, fast_path: bool = True):
+        self.backend = backend or get_backend()
+        self.fast_path = fast_path
+        self.price_selectors = {
+            competitor: [self.backend.compile(selector) for selector in selectors]
+            for competitor, selectors in price_selectors.items()
+        }
+        self.link_selectors = {
+            competitor: [self.backend.compile(selector) for selector in selectors]
+            for competitor, selectors in link_selectors.items()
+        }
+        # Markers cover the selectors in priority order up to the first one that has no marker
+        self.price_markers = {}
+        for competitor, selectors in price_selectors.items():
+            markers = []
+            for selector in selectors:
+                marker = price_marker(selector)
+                if marker is None:
+                    break
+                markers.append(marker)
+            self.price_markers[competitor] = markers
+
+    def fast_price(self, content: bytes, competitor: str) -> Optional[float]:
+        """Price read from the raw bytes, or None when only a full parse can tell"""
+        raw_text = None
+        for marker in self.price_markers.get(competitor, []):
+            match = None
+            for candidate in marker.candidates(content):
+                if raw_text is None:
+                    raw_text = [(region.start(), region.end()) for region in _RAW_TEXT.finditer(content)]
+                if not any(start < candidate.start() < end for start, end in raw_text):
+                    match = candidate
+                    break
+            if match is None:
+                continue
+            # Only trust plain text followed directly by the element's closing tag;
+            # nested markup or entities need the real parser
+            end = content.find(b'<', match.end())
+            closing = b'</' + match.group(1)
+            if end < 0 or content[end:end + len(closing)].lower() != closing.lower():
+                return None
+            text = content[match.end():end]
+            if b'&' in text:
+                return None
+            # The first element for this selector is what a full parse would pick too
+            return extract_price(text.decode('utf-8', 'replace').strip())
+        return None
+
+    def price(self, content: bytes, competitor: str) -> Optional[float]:
+        """First parseable price for the competitor's selectors, tried in order"""
+        if self.fast_path:
+            price = self.fast_price(content, competitor)
+            if price:
+                return price
+
+        tree = self.backend.parse(content)
+        for selector in self.price_selectors.get(competitor, []):
+            text = self.backend.first_text(tree, selector)
+            if text:
+                price = extract_price(text.strip())
+                if price:
+                    return price
+        return None
+
+    def links(self, content: bytes, competitor: str) -> List[str]:
+        """href values of the competitor's product links, in selector then document order"""
+        tree = self.backend.parse(content)
+        hrefs = []
+        for selector in self.link_selectors.get(competitor, []):
+            hrefs.extend(href for href in self.backend.attributes(tree, selector, 'href') if href)
+        return hrefs
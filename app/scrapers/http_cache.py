@@ -0,0 +1,135 @@
+"""
+Scraper HTTP Cache
+Disk-backed cache of competitor pages keyed by URL. Fresh entries are served
+without a request; stale ones are revalidated with If-None-Match/If-Modified-Since.
+Parsed results are stored next to each page so an unchanged page is never re-parsed.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+class CacheEntry:
+    def __init__(self, url: str, meta: Dict, path: str):
+        self.url = url
+        self.meta = meta
+        self._path = path
+        self._body: Optional[bytes] = None
+
+    @property
+    def age_seconds(self) -> float:
+        return max(0.0, time.time() - self.meta['fetched_at'])
+
+    @property
+    def body(self) -> bytes:
+        if self._body is None:
+            with open(f"{self._path}.body", 'rb') as f:
+                self._body = f.read()
+        return self._body
+
+    def parsed(self, kind: str) -> Optional[Dict]:
+        """Cached parse result as {'value': ...}, or None if this page was never parsed as kind"""
+        return self.meta.get('parsed', {}).get(kind)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.meta.get('etag'):
+            headers['If-None-Match'] = self.meta['etag']
+        if self.meta.get('last_modified'):
+            headers['If-Modified-Since'] = self.meta['last_modified']
+        return headers
+
+class HTTPCache:
+    def __init__(self, directory: Optional[str] = None, ttl_seconds: Optional[float] = None,
+                 ttl_overrides: Optional[Dict[str, float]] = None):
+        self.directory = directory or settings.SCRAPER_HTTP_CACHE_DIR
+        self.ttl_seconds = settings.SCRAPER_HTTP_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.ttl_overrides = settings.SCRAPER_HTTP_CACHE_TTL_OVERRIDES if ttl_overrides is None else ttl_overrides
+
+    def ttl_for(self, competitor: str) -> float:
+        return self.ttl_overrides.get(competitor, self.ttl_seconds)
+
+    def _path(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _write(self, path: str, data: bytes):
+        """Write via a temp file and rename so readers never see a partial file"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{id(data)}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        path = self._path(url)
+        try:
+            with open(f"{path}.json") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        # Hash collisions are practically impossible, but never serve another URL's page
+        if meta.get('url') != url or not os.path.exists(f"{path}.body"):
+            return None
+        return CacheEntry(url, meta, path)
+
+    def is_fresh(self, entry: CacheEntry, competitor: str) -> bool:
+        return entry.age_seconds < self.ttl_for(competitor)
+
+    def store(self, url: str, body: bytes, headers) -> CacheEntry:
+        """Save a 200 response, replacing any cached page and its parse results"""
+        path = self._path(url)
+        meta = {
+            'url': url,
+            'fetched_at': time.time(),
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'parsed': {}
+        }
+        self._write(f"{path}.body", body)
+        self._write(f"{path}.json", json.dumps(meta).encode())
+        entry = CacheEntry(url, meta, path)
+        entry._body = body
+        return entry
+
+    def revalidated(self, entry: CacheEntry, headers) -> CacheEntry:
+        """Record a 304: the cached page is current again, parse results stay valid"""
+        entry.meta['fetched_at'] = time.time()
+        # A 304 may carry updated validators
+        entry.meta['etag'] = headers.get('etag') or entry.meta.get('etag')
+        entry.meta['last_modified'] = headers.get('last-modified') or entry.meta.get('last_modified')
+        self._write(f"{entry._path}.json", json.dumps(entry.meta).encode())
+        return entry
+
+    def store_parsed(self, entry: CacheEntry, kind: str, value: Any):
+        entry.meta.setdefault('parsed', {})[kind] = {'value': value}
+        self._write(f"{entry._path}.json", json.dumps(entry.meta).encode())
+
+    def prune(self, max_age_seconds: Optional[float] = None) -> int:
+        """Delete entries not fetched or revalidated within max_age_seconds; returns entries removed"""
+        max_age = settings.SCRAPER_HTTP_CACHE_RETENTION_SECONDS if max_age_seconds is None else max_age_seconds
+        cutoff = time.time() - max_age
+        removed = 0
+        if not os.path.isdir(self.directory):
+            return 0
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for item in os.scandir(shard.path):
+                if not item.name.endswith('.json'):
+                    continue
+                try:
+                    if item.stat().st_mtime >= cutoff:
+                        continue
+                    base = item.path[:-len('.json')]
+                    os.remove(item.path)
+                    if os.path.exists(f"{base}.body"):
+                        os.remove(f"{base}.body")
+                    removed += 1
+                except OSError as e:
+                    print(f"Error pruning scraper cache entry {item.path}: {e}")
+        return removed
@@ -0,0 +1,119 @@
+"""
+Competitor Price Refresh
+Reads the latest stored competitor prices for a product and refreshes them in the
+background, so request handlers never wait on a scrape
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.product import Product, CompetitorPrice, CompetitorScrapeAttempt
+from app.scrapers.competitor_scraper import CompetitorPriceScraper
+
+# Rows written by one refresh land within this window of each other
+SCRAPE_BATCH_WINDOW = timedelta(minutes=5)
+MAX_ROWS_PER_SCRAPE = 30
+
+def scrape_age_seconds(created_at: datetime) -> float:
+    # SQLite hands back naive UTC timestamps, PostgreSQL timezone-aware ones
+    now = datetime.now(timezone.utc) if created_at.tzinfo else datetime.utcnow()
+    return max(0.0, (now - created_at).total_seconds())
+
+def latest_competitor_prices(db: Session, product_id: int) -> Tuple[List[Dict], Optional[float]]:
+    """Prices from the most recent scrape of a product and their age in seconds (None if never scraped)"""
+    rows = db.query(CompetitorPrice).filter(
+        CompetitorPrice.product_id == product_id
+    ).order_by(
+        CompetitorPrice.created_at.desc(), CompetitorPrice.id.desc()
+    ).limit(MAX_ROWS_PER_SCRAPE).all()
+    if not rows:
+        return [], None
+
+    newest = rows[0].created_at
+    prices = [
+        {'competitor': row.competitor_name, 'price': row.price, 'url': row.url}
+        for row in rows
+        if newest is None or row.created_at is None or newest - row.created_at <= SCRAPE_BATCH_WINDOW
+    ]
+    return prices, (scrape_age_seconds(newest) if newest else None)
+
+def refresh_age_seconds(db: Session, product_id: int, prices_age: Optional[float]) -> Optional[float]:
+    """Seconds since the product was last scraped, whether or not prices were found (None if never)"""
+    attempted_at = db.query(func.max(CompetitorScrapeAttempt.created_at)).filter(
+        CompetitorScrapeAttempt.product_id == product_id
+    ).scalar()
+    ages = [age for age in (prices_age, scrape_age_seconds(attempted_at) if attempted_at else None) if age is not None]
+    return min(ages) if ages else None
+
+def is_stale(age_seconds: Optional[float]) -> bool:
+    return age_seconds is None or age_seconds > settings.COMPETITOR_PRICE_MAX_AGE_SECONDS
+
+class CompetitorPriceRefresher:
+    """Runs at most one refresh per product at a time"""
+
+    def __init__(self, scraper: Optional[CompetitorPriceScraper] = None):
+        self.scraper = scraper or CompetitorPriceScraper()
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def claim(self, product_id: int) -> bool:
+        """Mark product_id as being refreshed; False if a refresh is already running"""
+        with self._lock:
+            if product_id in self._in_flight:
+                return False
+            self._in_flight.add(product_id)
+            return True
+
+    def release(self, product_id: int):
+        with self._lock:
+            self._in_flight.discard(product_id)
+
+    def is_refreshing(self, product_id: int) -> bool:
+        with self._lock:
+            return product_id in self._in_flight
+
+    def refresh(self, product_id: int) -> int:
+        """Scrape and store competitor prices for a product claimed with claim(); returns rows stored"""
+        db = SessionLocal()
+        try:
+            product = db.query(Product).filter(Product.id == product_id).first()
+            if not product:
+                return 0
+            competitor_prices = self.scraper.get_competitor_prices(str(product.name), str(product.category))
+            return self.store(db, product_id, competitor_prices)
+        except Exception as e:
+            print(f"Error refreshing competitor prices for product {product_id}: {e}")
+            db.rollback()
+            self.record_failure(db, product_id, e)
+            return 0
+        finally:
+            db.close()
+            self.release(product_id)
+
+    def store(self, db: Session, product_id: int, competitor_prices: List[Dict]) -> int:
+        # The attempt is recorded even when nothing was found (blocked or changed markup),
+        # so the product is not treated as never scraped and re-queued on every request
+        db.add(CompetitorScrapeAttempt(product_id=product_id, prices_found=len(competitor_prices)))
+        for cp in competitor_prices:
+            db.add(CompetitorPrice(
+                product_id=product_id,
+                competitor_name=cp['competitor'],
+                price=cp['price'],
+                url=cp.get('url')
+            ))
+        db.commit()
+        return len(competitor_prices)
+
+    def record_failure(self, db: Session, product_id: int, error: Exception):
+        try:
+            db.add(CompetitorScrapeAttempt(product_id=product_id, prices_found=0, error=str(error)[:500]))
+            db.commit()
+        except Exception as e:
+            print(f"Error recording failed scrape of product {product_id}: {e}")
+            db.rollback()
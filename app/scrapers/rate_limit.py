@@ -0,0 +1,83 @@
+"""
+Scraper Rate Limiting
+Per-domain token buckets and concurrency limits plus a global concurrency cap
+for the asyncio scraper, replacing blanket sleeps between requests
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Dict
+from urllib.parse import urlparse
+
+class TokenBucket:
+    """Allows rate requests per second on average with bursts of up to capacity
+
+    Tokens are reserved under a thread lock and the caller sleeps off any debt,
+    so one bucket can pace coroutines running on different event loops.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+class DomainLimiter:
+    def __init__(self, rate_per_second: float, burst: int, per_domain_concurrency: int,
+                 global_concurrency: int):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.per_domain_concurrency = per_domain_concurrency
+        self.global_concurrency = global_concurrency
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+        # asyncio semaphores belong to one event loop, so each loop gets its own set
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _bucket(self, domain: str) -> TokenBucket:
+        with self._buckets_lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                bucket = self._buckets[domain] = TokenBucket(self.rate_per_second, self.burst)
+            return bucket
+
+    def _loop_semaphores(self):
+        loop = asyncio.get_running_loop()
+        semaphores = self._semaphores.get(loop)
+        if semaphores is None:
+            semaphores = self._semaphores[loop] = {
+                None: asyncio.Semaphore(self.global_concurrency)
+            }
+        return semaphores
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """Hold a request slot for url's domain: concurrency first, then the rate limit"""
+        domain = urlparse(url).netloc.lower()
+        semaphores = self._loop_semaphores()
+        domain_semaphore = semaphores.get(domain)
+        if domain_semaphore is None:
+            domain_semaphore = semaphores[domain] = asyncio.Semaphore(self.per_domain_concurrency)
+
+        async with domain_semaphore:
+            await self._bucket(domain).acquire()
+            async with semaphores[None]:
+                yield
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Rebuild the analytics rollup tables from orders, order items and price history.
+Run once after upgrading, and after loading data with scripts that bypass the app
+"""
+
+from app.core.database import engine, SessionLocal
+from app.models import base, user, product, order, analytics
+from app.core.rollups import rebuild_rollups
+
+def backfill():
+    """Create the rollup tables if needed and recompute their contents"""
+    base.Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        print("Rebuilding analytics rollups...")
+        counts = rebuild_rollups(db)
+        print(f"Daily revenue rows: {counts['revenue_rows']}")
+        print(f"Daily product sales rows: {counts['product_sales_rows']}")
+        print(f"Daily price change rows: {counts['price_change_rows']}")
+        print("Analytics rollups rebuilt successfully!")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    backfill()
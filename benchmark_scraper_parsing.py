@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark Competitor Page Parsing
+Times price and product link extraction for every installed parser backend, with and
+without the byte-level price fast path, against the original BeautifulSoup html.parser
+code. Uses saved pages from --fixtures (<competitor>_*.html product pages and
+<competitor>_search*.html search pages) or generates marketplace-sized synthetic ones,
+plus small edge-case pages (prices in comments, scripts, unquoted attributes).
+"""
+
+import argparse
+import glob
+import os
+import random
+import time
+
+from bs4 import BeautifulSoup
+
+from app.scrapers.competitor_scraper import PRICE_SELECTORS, PRODUCT_LINK_SELECTORS
+from app.scrapers.html_parsing import PARSER_BACKENDS, CompetitorParser, extract_price
+
+FIXTURES_DIR = "data/scraper_fixtures"
+
+# How each competitor marks up its price in the synthetic pages: plain text the fast
+# path can read, nested markup that needs a full parse, and pages with no price at all
+PRICE_MARKUP = {
+    'amazon': [
+        '<span class="a-offscreen">${price}</span>',
+        '<span class="a-price-whole">{whole}<span class="a-price-decimal">.</span></span>'
+        '<span class="a-price-fraction">{fraction}</span>',
+        ''
+    ],
+    'ebay': [
+        '<span itemprop="price" content="{price}">US ${price}</span>',
+        '<div class="x-price-primary"><span class="ux-textspans">US ${price}</span></div>',
+        ''
+    ],
+    'walmart': [
+        '<span data-automation-id="product-price" class="f2">${price}</span>',
+        '<span class="price-main"><span class="visuallyhidden">current price</span> ${price}</span>',
+        ''
+    ]
+}
+
+# Small pages where a naive byte scan disagrees with a real parser; always checked
+EDGE_CASE_PAGES = [
+    ('amazon', b'<!-- <span class="a-price-whole">1.00</span> --><span class="a-price-whole">99.00</span>'),
+    ('amazon', b"<script>var t = '<span class=\"a-price-whole\">5</span>';</script>"
+               b'<span class="a-price-whole">42</span>'),
+    ('amazon', b'<style>/* <span class="a-offscreen">$3</span> */</style><span class="a-offscreen">$8.00</span>'),
+    ('amazon', b'<span class=foo title=a-price-whole>7</span><span class="a-offscreen">$19.00</span>'),
+    ('amazon', b'<span title="a > b" class=a-offscreen>$6.50</span>'),
+    ('amazon', b'<SPAN CLASS="x a-offscreen">$1,299.99</SPAN>'),
+    ('amazon', b'<span class="a-offscreen-x">$9</span><span class="a-offscreen">$4</span>'),
+    ('amazon', b'<span class="a-price-whole">12<span>.</span></span><span class="a-offscreen">$3</span>'),
+    ('ebay', b'<!-- <span itemprop="price">US $1</span> --><span itemprop="price" content="2">US $2.25</span>'),
+    ('ebay', b'<span itemprop="price">US &#36;7.10</span>'),
+    ('walmart', b'<span data-automation-id="product-price-old">$5</span>'
+                b'<span data-automation-id="product-price">$15.75</span>'),
+]
+
+def synthetic_product_page(competitor: str, rng: random.Random, markup: str, size_kb: int) -> bytes:
+    """A product page of roughly size_kb with the price block about two thirds of the way down"""
+    price = f"{rng.uniform(5, 500):.2f}"
+    whole, fraction = price.split('.')
+    blocks = []
+    for i in range(size_kb * 2):
+        blocks.append(
+            f'<div class="row r{i}"><a href="/browse/{rng.randrange(10 ** 6)}" class="nav-link">'
+            f'Related item {i}</a><span class="badge">{rng.randrange(100)} ratings</span>'
+            f'<p data-idx="{i}">{"lorem ipsum dolor sit amet " * 12}</p></div>'
+        )
+    position = len(blocks) * 2 // 3
+    blocks.insert(position, f'<div id="buybox">{markup.format(price=price, whole=whole, fraction=fraction)}</div>')
+    scripts = '<script>var data = {"items": [%s]};</script>' % ','.join(str(i) for i in range(2000))
+    return (
+        f'<!DOCTYPE html><html><head><title>{competitor} product</title>{scripts}</head>'
+        f'<body><header class="nav">{competitor}</header>{"".join(blocks)}</body></html>'
+    ).encode()
+
+def synthetic_search_page(competitor: str, rng: random.Random, size_kb: int) -> bytes:
+    link = {
+        'amazon': '<a class="a-link-normal" href="/item-{n}/dp/B0{n:08d}">Result {n}</a>',
+        'ebay': '<a class="s-item__link" href="https://www.ebay.com/itm/{n}">Result {n}</a>',
+        'walmart': '<a class="product-title-link" href="/ip/item-{n}/{n}">Result {n}</a>'
+    }[competitor]
+    results = [
+        f'<div class="result"><img src="/img/{n}.jpg"/>{link.format(n=n)}'
+        f'<p>{"lorem ipsum dolor sit amet " * 20}</p></div>'
+        for n in (rng.randrange(10 ** 7) for _ in range(size_kb))
+    ]
+    return f'<html><body><div class="results">{"".join(results)}</div></body></html>'.encode()
+
+def load_pages(fixtures_dir: str, size_kb: int):
+    """(product pages, search pages) as lists of (competitor, content)"""
+    product_pages, search_pages = [], []
+    for competitor in PRICE_SELECTORS:
+        for path in sorted(glob.glob(os.path.join(fixtures_dir, f"{competitor}_*.html"))):
+            with open(path, 'rb') as f:
+                pages = search_pages if os.path.basename(path).startswith(f"{competitor}_search") else product_pages
+                pages.append((competitor, f.read()))
+    if product_pages or search_pages:
+        print(f"Loaded {len(product_pages)} product and {len(search_pages)} search pages from {fixtures_dir}")
+        return product_pages + EDGE_CASE_PAGES, search_pages
+
+    rng = random.Random(42)
+    for competitor, variants in PRICE_MARKUP.items():
+        for markup in variants:
+            product_pages.append((competitor, synthetic_product_page(competitor, rng, markup, size_kb)))
+        search_pages.append((competitor, synthetic_search_page(competitor, rng, size_kb)))
+    print(f"No fixtures in {fixtures_dir}; generated {len(product_pages)} product and "
+          f"{len(search_pages)} search pages of ~{size_kb} KB")
+    return product_pages + EDGE_CASE_PAGES, search_pages
+
+def baseline_price(content: bytes, competitor: str):
+    """The original per-call BeautifulSoup html.parser implementation"""
+    soup = BeautifulSoup(content, 'html.parser')
+    for selector in PRICE_SELECTORS.get(competitor, []):
+        price_element = soup.select_one(selector)
+        if price_element:
+            price = extract_price(price_element.get_text().strip())
+            if price:
+                return price
+    return None
+
+def baseline_links(content: bytes, competitor: str):
+    soup = BeautifulSoup(content, 'html.parser')
+    hrefs = []
+    for selector in PRODUCT_LINK_SELECTORS.get(competitor, []):
+        for link in soup.select(selector):
+            href = link.get('href')
+            if href and isinstance(href, str):
+                hrefs.append(href)
+    return hrefs
+
+def time_pages(parse, pages, repeat: int):
+    """Best-of-repeat milliseconds per page, and the results of the last pass"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [parse(content, competitor) for competitor, content in pages]
+        best = min(best, time.perf_counter() - started)
+    return best * 1000 / max(len(pages), 1), results
+
+def benchmark(fixtures_dir: str, size_kb: int, repeat: int):
+    product_pages, search_pages = load_pages(fixtures_dir, size_kb)
+
+    candidates = [('bs4 html.parser (original)', baseline_price, baseline_links, None)]
+    for name, backend_class in PARSER_BACKENDS.items():
+        try:
+            backend = backend_class()
+        except ImportError:
+            print(f"Skipping {name}: not installed")
+            continue
+        for fast_path in (False, True):
+            parser = CompetitorParser(PRICE_SELECTORS, PRODUCT_LINK_SELECTORS, backend, fast_path=fast_path)
+            label = f"{name}{' + fast path' if fast_path else ''}"
+            candidates.append((label, parser.price, parser.links, parser if fast_path else None))
+
+    print(f"\n{'backend':<30} {'price ms/page':>14} {'speedup':>8} {'links ms/page':>14} {'speedup':>8}  "
+          f"{'fast path hits':>14}  matches")
+    baseline = None
+    for label, price, links, fast_parser in candidates:
+        price_ms, prices = time_pages(price, product_pages, repeat)
+        links_ms, hrefs = time_pages(links, search_pages, repeat) if search_pages else (0.0, [])
+        if baseline is None:
+            baseline = (price_ms, links_ms, prices, [sorted(set(h)) for h in hrefs])
+        mismatched = [index for index, (price, expected) in enumerate(zip(prices, baseline[2])) if price != expected]
+        matches = not mismatched and [sorted(set(h)) for h in hrefs] == baseline[3]
+        hits = '-'
+        if fast_parser is not None:
+            fast_hits = sum(1 for competitor, content in product_pages if fast_parser.fast_price(content, competitor))
+            hits = f"{fast_hits}/{len(product_pages)}"
+        print(
+            f"{label:<30} {price_ms:>14.2f} {baseline[0] / price_ms:>7.1f}x "
+            f"{links_ms:>14.2f} {(baseline[1] / links_ms) if links_ms else 0:>7.1f}x  "
+            f"{hits:>14}  {'yes' if matches else 'NO'}"
+        )
+        for index in mismatched:
+            competitor, content = product_pages[index]
+            print(f"    {competitor} page {index}: got {prices[index]}, expected {baseline[2][index]} "
+                  f"({content[:80]!r})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark competitor page parsing backends")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of saved competitor pages")
+    parser.add_argument("--size-kb", type=int, default=300, help="Approximate size of generated pages")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per backend (best is reported)")
+    args = parser.parse_args()
+    benchmark(args.fixtures, args.size_kb, args.repeat)
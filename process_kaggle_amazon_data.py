@@ -9,111 +9,269 @@ import numpy as np
 import os
 from datetime import datetime
 import re
+import argparse
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-def process_kaggle_amazon_data():
-    """Process the Kaggle Amazon dataset for training"""
-    print("Processing Kaggle Amazon dataset...")
+RAW_DATA_PATH = "archive/home/sdf/marketing_sample_for_amazon_com-ecommerce__20200101_20200131__10k_data.csv"
+OUTPUT_PATH = "data/amazon_processed_data.csv"
+
+# Map Amazon top-level categories to simplified categories (first match wins)
+CATEGORY_MAPPING = {
+    'Sports & Outdoors': 'sports',
+    'Toys & Games': 'toys',
+    'Electronics': 'electronics',
+    'Home & Kitchen': 'home',
+    'Clothing, Shoes & Jewelry': 'clothing',
+    'Books': 'books',
+    'Beauty & Personal Care': 'beauty',
+    'Health & Household': 'health',
+    'Automotive': 'automotive',
+    'Tools & Home Improvement': 'tools',
+    'Garden & Outdoor': 'garden',
+    'Pet Supplies': 'pets',
+    'Baby Products': 'baby',
+    'Office Products': 'office',
+    'Industrial & Scientific': 'industrial'
+}
+
+# Parquet column types; fixed up front so an empty or all-null first chunk can't decide them
+PARQUET_COLUMN_TYPES = {
+    'price': 'float32',
+    'title_length': 'int32',
+    'word_count': 'int32',
+    'category': 'string',
+    'views': 'int32',
+    'add_to_cart': 'int32',
+    'purchases': 'int32',
+    'stock_quantity': 'int32',
+    'competitor_price': 'float32',
+    'month': 'int32',
+    'optimal_price': 'float32',
+    'conversion_rate': 'float32',
+    'stock_percentage': 'float32',
+    'price_ratio': 'float32'
+}
+
+def process_kaggle_amazon_data(raw_data_path: str = RAW_DATA_PATH, output_path: str = OUTPUT_PATH,
+                               seed: int = 42, chunksize: int = 100000, workers: int = 1):
+    """Process the Kaggle Amazon dataset for training
     
-    # Load the raw Kaggle dataset
-    raw_data_path = "archive/home/sdf/marketing_sample_for_amazon_com-ecommerce__20200101_20200131__10k_data.csv"
+    The raw file is streamed in chunks of `chunksize` rows and each processed chunk is
+    appended to the output, so peak memory is bounded by the chunk size rather than the
+    file size. With workers > 1 chunks are processed in a process pool. An output path
+    ending in .parquet is written as Parquet with float32/int32 columns.
+    """
+    print("Processing Kaggle Amazon dataset...")
     
     if not os.path.exists(raw_data_path):
         print(f"Raw dataset not found at {raw_data_path}")
         return False
     
-    # Read the CSV file
-    df = pd.read_csv(raw_data_path)
-    print(f"Loaded raw dataset with shape: {df.shape}")
-    print(f"Columns: {list(df.columns)}")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_output_path = f"{output_path}.tmp"
+    stats = ProcessingStats()
+    started = time.perf_counter()
     
-    # Clean and process the data
-    processed_data = []
+    # Stream the CSV file
+    chunks = pd.read_csv(raw_data_path, chunksize=chunksize)
     
-    for idx, row in df.iterrows():
-        try:
-            # Extract price information
-            list_price = extract_price(row.get('List Price', ''))
-            selling_price = extract_price(row.get('Selling Price', ''))
-            
-            if not selling_price or selling_price <= 0:
-                continue
-            
-            # Extract category
-            category = extract_category(row.get('Category', ''))
-            
-            # Extract product name and calculate features
-            product_name = str(row.get('Product Name', ''))
-            title_length = len(product_name)
-            word_count = len(product_name.split())
-            
-            # Generate synthetic demand metrics (since real data doesn't have these)
-            views = np.random.randint(100, 10000)
-            add_to_cart = np.random.randint(10, int(views * 0.1))
-            purchases = np.random.randint(1, int(add_to_cart * 0.3))
-            stock_quantity = np.random.randint(10, 200)
-            
-            # Calculate derived features
-            conversion_rate = purchases / views if views > 0 else 0
-            stock_percentage = stock_quantity / 200.0
-            
-            # Generate competitor price (synthetic)
-            competitor_price = selling_price * np.random.uniform(0.7, 1.3)
-            price_ratio = selling_price / competitor_price if competitor_price > 0 else 1.0
-            
-            # Calculate optimal price (target variable)
-            # This is a simplified calculation - in reality, this would be based on historical performance
-            optimal_price = (
-                selling_price * 0.6 +
-                competitor_price * 0.25 +
-                (list_price or selling_price) * 0.15
-            ) + np.random.normal(0, selling_price * 0.05)
-            
-            # Create processed record
-            processed_record = {
-                'price': float(selling_price),
-                'title_length': int(title_length),
-                'word_count': int(word_count),
-                'category': category,
-                'views': int(views),
-                'add_to_cart': int(add_to_cart),
-                'purchases': int(purchases),
-                'stock_quantity': int(stock_quantity),
-                'competitor_price': float(competitor_price),
-                'month': np.random.randint(1, 13),  # Random month
-                'optimal_price': float(optimal_price),
-                'conversion_rate': float(conversion_rate),
-                'stock_percentage': float(stock_percentage),
-                'price_ratio': float(price_ratio)
-            }
-            
-            processed_data.append(processed_record)
-            
-        except Exception as e:
-            print(f"Error processing row {idx}: {e}")
-            continue
-    
-    # Convert to DataFrame
-    processed_df = pd.DataFrame(processed_data)
-    
-    print(f"Processed {len(processed_df)} records")
-    print(f"Final dataset shape: {processed_df.shape}")
-    
-    # Save processed data
-    output_path = "data/amazon_processed_data.csv"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    processed_df.to_csv(output_path, index=False)
+    parquet_writer = None
+    for processed_df in _process_chunks(chunks, seed, workers, stats):
+        # Append each processed chunk as soon as it is ready
+        if output_path.endswith('.parquet'):
+            parquet_writer = _write_parquet_chunk(parquet_writer, tmp_output_path, processed_df)
+        else:
+            processed_df.to_csv(tmp_output_path, mode='a' if stats.chunks else 'w',
+                                header=not stats.chunks, index=False)
+        stats.add(processed_df)
+        
+        elapsed = time.perf_counter() - started
+        print(f"Chunk {stats.chunks}: {stats.raw_rows} rows read, {stats.rows} processed "
+              f"({stats.raw_rows / elapsed:,.0f} rows/sec)")
+    
+    if parquet_writer is not None:
+        parquet_writer.close()
+    if not stats.chunks:
+        print("Raw dataset is empty")
+        return False
+    os.replace(tmp_output_path, output_path)
     
+    elapsed = time.perf_counter() - started
+    print(f"Processed {stats.rows} of {stats.raw_rows} records in {elapsed:.2f}s "
+          f"({stats.raw_rows / elapsed:,.0f} rows/sec)")
     print(f"Processed data saved to {output_path}")
     
     # Print some statistics
     print("\nDataset Statistics:")
-    print(f"Average price: ${processed_df['price'].mean():.2f}")
-    print(f"Price range: ${processed_df['price'].min():.2f} - ${processed_df['price'].max():.2f}")
-    print(f"Categories: {processed_df['category'].nunique()}")
-    print(f"Average conversion rate: {processed_df['conversion_rate'].mean():.4f}")
+    print(f"Average price: ${stats.price_sum / max(stats.rows, 1):.2f}")
+    print(f"Price range: ${stats.price_min:.2f} - ${stats.price_max:.2f}")
+    print(f"Categories: {len(stats.categories)}")
+    print(f"Average conversion rate: {stats.conversion_rate_sum / max(stats.rows, 1):.4f}")
     
     return True
 
+def _write_parquet_chunk(writer, path: str, processed_df: pd.DataFrame):
+    """Append a chunk to a Parquet file, opening the writer on the first chunk"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    # Narrow numeric columns so training can load them as float32 without conversion
+    columnar_df = processed_df.astype({
+        col: np.float32 if pd.api.types.is_float_dtype(dtype) else np.int32
+        for col, dtype in processed_df.dtypes.items()
+        if pd.api.types.is_numeric_dtype(dtype)
+    })
+    columnar_df['category'] = columnar_df['category'].astype(str)
+    
+    if writer is None:
+        schema = pa.schema([(name, pa.type_for_alias(alias)) for name, alias in PARQUET_COLUMN_TYPES.items()])
+        writer = pq.ParquetWriter(path, schema)
+    table = pa.Table.from_pandas(columnar_df, schema=writer.schema, preserve_index=False)
+    writer.write_table(table)
+    return writer
+
+class ProcessingStats:
+    """Running totals so summary statistics never need the whole dataset in memory"""
+    
+    def __init__(self):
+        self.chunks = 0
+        self.raw_rows = 0
+        self.rows = 0
+        self.price_sum = 0.0
+        self.price_min = float('inf')
+        self.price_max = float('-inf')
+        self.conversion_rate_sum = 0.0
+        self.categories = set()
+    
+    def add(self, processed_df: pd.DataFrame):
+        self.chunks += 1
+        self.rows += len(processed_df)
+        if len(processed_df):
+            self.price_sum += float(processed_df['price'].sum())
+            self.price_min = min(self.price_min, float(processed_df['price'].min()))
+            self.price_max = max(self.price_max, float(processed_df['price'].max()))
+            self.conversion_rate_sum += float(processed_df['conversion_rate'].sum())
+            self.categories.update(processed_df['category'].unique())
+
+def _process_chunk(chunk: pd.DataFrame, seed: int, chunk_index: int) -> pd.DataFrame:
+    # Seed per chunk so output is reproducible whatever the worker count
+    return process_raw_frame(chunk, np.random.default_rng([seed, chunk_index]))
+
+def _process_chunks(chunks, seed: int, workers: int, stats: ProcessingStats):
+    """Yield processed chunks in input order, processing up to `workers` at a time"""
+    if workers <= 1:
+        for chunk_index, chunk in enumerate(chunks):
+            stats.raw_rows += len(chunk)
+            yield _process_chunk(chunk, seed, chunk_index)
+        return
+    
+    # Keep a bounded window of in-flight chunks so memory stays proportional to workers
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk_index, chunk in enumerate(chunks):
+            stats.raw_rows += len(chunk)
+            pending.append(executor.submit(_process_chunk, chunk, seed, chunk_index))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def process_raw_frame(df: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """Turn raw Kaggle rows into training records using whole-column operations"""
+    empty = pd.Series('', index=df.index)
+    
+    # Extract price information
+    list_price = extract_prices(df.get('List Price', empty))
+    selling_price = extract_prices(df.get('Selling Price', empty))
+    
+    valid = (selling_price > 0).to_numpy()
+    df = df.loc[valid]
+    empty = empty.loc[valid]
+    list_price = list_price.to_numpy()[valid]
+    selling_price = selling_price.to_numpy()[valid]
+    n = len(df)
+    
+    # Extract category
+    category = extract_categories(df.get('Category', empty))
+    
+    # Extract product name and calculate features
+    product_name = df.get('Product Name', empty).fillna('').astype(str)
+    title_length = product_name.str.len().to_numpy()
+    word_count = product_name.str.split().str.len().to_numpy()
+    
+    # Generate synthetic demand metrics (since real data doesn't have these).
+    # Upper bounds are clamped so every row has a non-empty range to draw from.
+    views = rng.integers(100, 10000, size=n)
+    add_to_cart = rng.integers(10, np.maximum((views * 0.1).astype(np.int64), 11))
+    purchases = rng.integers(1, np.maximum((add_to_cart * 0.3).astype(np.int64), 2))
+    stock_quantity = rng.integers(10, 200, size=n)
+    
+    # Calculate derived features
+    conversion_rate = purchases / views
+    stock_percentage = stock_quantity / 200.0
+    
+    # Generate competitor price (synthetic)
+    competitor_price = selling_price * rng.uniform(0.7, 1.3, size=n)
+    price_ratio = selling_price / competitor_price
+    
+    # Calculate optimal price (target variable)
+    # This is a simplified calculation - in reality, this would be based on historical performance
+    reference_price = np.where(np.nan_to_num(list_price) > 0, list_price, selling_price)
+    optimal_price = (
+        selling_price * 0.6 +
+        competitor_price * 0.25 +
+        reference_price * 0.15
+    ) + rng.normal(0, selling_price * 0.05)
+    
+    return pd.DataFrame({
+        'price': selling_price.astype(float),
+        'title_length': title_length.astype(int),
+        'word_count': word_count.astype(int),
+        'category': category.to_numpy(),
+        'views': views.astype(int),
+        'add_to_cart': add_to_cart.astype(int),
+        'purchases': purchases.astype(int),
+        'stock_quantity': stock_quantity.astype(int),
+        'competitor_price': competitor_price.astype(float),
+        'month': rng.integers(1, 13, size=n),  # Random month
+        'optimal_price': optimal_price.astype(float),
+        'conversion_rate': conversion_rate.astype(float),
+        'stock_percentage': stock_percentage.astype(float),
+        'price_ratio': price_ratio.astype(float)
+    })
+
+def _map_unique(series: pd.Series, transform, missing_value) -> np.ndarray:
+    """Apply a vectorized transform to the distinct values only, then broadcast back"""
+    codes, uniques = pd.factorize(series)
+    mapped = np.asarray(transform(pd.Series(uniques, dtype=object)))
+    return np.where(codes >= 0, mapped[codes] if len(mapped) else missing_value, missing_value)
+
+def extract_prices(price_series: pd.Series) -> pd.Series:
+    """Vectorized extract_price: first number in each string, NaN when there is none"""
+    def parse(values: pd.Series) -> pd.Series:
+        numbers = (
+            values.astype(str)
+            .str.replace(',', '', regex=False)
+            .str.extract(r'(\d+\.?\d*)', expand=False)
+        )
+        return pd.to_numeric(numbers, errors='coerce').astype(float)
+    
+    return pd.Series(_map_unique(price_series, parse, np.nan).astype(float), index=price_series.index)
+
+def extract_categories(category_series: pd.Series) -> pd.Series:
+    """Vectorized extract_category: map the first '|' segment to a simplified category"""
+    def categorize(values: pd.Series) -> np.ndarray:
+        values = values.astype(str)
+        main_category = values.str.split('|').str[0].str.strip()
+        conditions = [main_category.str.contains(key, regex=False, na=False).to_numpy(dtype=bool)
+                      for key in CATEGORY_MAPPING]
+        categories = np.select(conditions, list(CATEGORY_MAPPING.values()), default='other')
+        return np.where((values == '').to_numpy(), 'Other', categories)
+    
+    return pd.Series(_map_unique(category_series, categorize, 'Other'), index=category_series.index)
+
 def extract_price(price_str):
     """Extract numeric price from string"""
     if pd.isna(price_str) or price_str == '':
@@ -139,41 +297,32 @@ def extract_category(category_str):
     categories = str(category_str).split('|')
     main_category = categories[0].strip()
     
-    # Map to simplified categories
-    category_mapping = {
-        'Sports & Outdoors': 'sports',
-        'Toys & Games': 'toys',
-        'Electronics': 'electronics',
-        'Home & Kitchen': 'home',
-        'Clothing, Shoes & Jewelry': 'clothing',
-        'Books': 'books',
-        'Beauty & Personal Care': 'beauty',
-        'Health & Household': 'health',
-        'Automotive': 'automotive',
-        'Tools & Home Improvement': 'tools',
-        'Garden & Outdoor': 'garden',
-        'Pet Supplies': 'pets',
-        'Baby Products': 'baby',
-        'Office Products': 'office',
-        'Industrial & Scientific': 'industrial'
-    }
-    
-    for key, value in category_mapping.items():
+    for key, value in CATEGORY_MAPPING.items():
         if key in main_category:
             return value
     
     return 'other'
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process the Kaggle Amazon dataset for training")
+    parser.add_argument("--input", default=RAW_DATA_PATH, help="Raw Kaggle CSV file")
+    parser.add_argument("--output", default=OUTPUT_PATH,
+                        help="Processed file to write (.csv, or .parquet for columnar output)")
+    parser.add_argument("--chunksize", type=int, default=100000, help="Rows per streamed chunk")
+    parser.add_argument("--workers", type=int, default=1, help="Processes used to handle chunks")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the synthetic columns")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Kaggle Amazon Dataset Processor")
     print("=" * 60)
     
-    success = process_kaggle_amazon_data()
+    success = process_kaggle_amazon_data(args.input, args.output, seed=args.seed,
+                                         chunksize=args.chunksize, workers=args.workers)
     
     if success:
         print("\n" + "=" * 60)
         print("Dataset processing completed successfully!")
         print("=" * 60)
     else:
-        print("\nDataset processing failed!") 
\ No newline at end of file
+        print("\nDataset processing failed!")
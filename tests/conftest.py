@@ -0,0 +1,10 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Build settings from defaults rather than whatever .env sits in the working directory,
+# and point the app's import-time engine at an in-memory database; tests make their own
+os.environ.setdefault("ENV_FILE", os.devnull)
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -0,0 +1,85 @@
+"""predict_batch gives the same prices as per-product predict_optimal_price, in one pass"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.dynamic_pricing_model import DEFAULT_FEATURE_NAMES, DynamicPricingEngine
+from app.ml.model_registry import ModelRegistry
+
+def sample_products(count=12, seed=0):
+    rng = np.random.default_rng(seed)
+    products = []
+    for _ in range(count):
+        base_price = float(rng.uniform(5, 500))
+        products.append({
+            'base_price': base_price,
+            'competitor_avg_price': base_price * float(rng.uniform(0.8, 1.2)),
+            'demand_score': float(rng.uniform(0, 1)),
+            'stock_level': float(rng.integers(0, 200)),
+            'seasonality_factor': float(rng.uniform(0.7, 1.4)),
+            'user_engagement': float(rng.uniform(0, 1)),
+            'conversion_rate': float(rng.uniform(0, 0.2)),
+            'time_since_last_price_change': float(rng.integers(0, 30))
+        })
+    return products
+
+def publish_model(registry, export):
+    """Promote a randomly initialised network; export adds the NumPy weights the numpy backend serves"""
+    torch = pytest.importorskip("torch")
+    from sklearn.preprocessing import StandardScaler
+    from app.ml.pricing_network import DynamicPricingModel
+
+    torch.manual_seed(0)
+    model = DynamicPricingModel(input_size=len(DEFAULT_FEATURE_NAMES))
+    model.eval()
+    scaler = StandardScaler().fit(pd.DataFrame(sample_products(50, seed=1))[DEFAULT_FEATURE_NAMES].to_numpy())
+    exporter = None
+    if export:
+        from app.ml.model_export import export_all
+        exporter = lambda output_dir: export_all(model, output_dir, input_size=len(DEFAULT_FEATURE_NAMES), scaler=scaler)
+    return registry.publish(model.state_dict(), {'feature_columns': list(DEFAULT_FEATURE_NAMES)},
+                            scaler=scaler, exporter=exporter)
+
+@pytest.fixture(params=["torch", "numpy"])
+def engine(request, tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    version = publish_model(registry, export=request.param == "numpy")
+    engine = DynamicPricingEngine(model_path=str(tmp_path / "missing.pth"), registry=registry)
+    # Every call must reach the model rather than answers cached by an earlier one
+    engine.prediction_cache = None
+    assert engine.load_model()
+    assert engine.model_version == version
+    assert engine._loaded.backend == request.param
+    return engine
+
+def test_predict_batch_matches_single_predictions(engine):
+    products = sample_products()
+    expected = np.array([engine.predict_optimal_price(product) for product in products])
+
+    for batch in (products, pd.DataFrame(products), pd.DataFrame(products)[DEFAULT_FEATURE_NAMES].to_numpy()):
+        prices = engine.predict_batch(batch)
+        assert prices.shape == (len(products),)
+        np.testing.assert_allclose(prices, expected, rtol=1e-5, atol=1e-6)
+
+def test_predict_batch_defaults_missing_features_to_zero(engine):
+    products = [{'base_price': product['base_price']} for product in sample_products(4)]
+    padded = [{**{name: 0.0 for name in DEFAULT_FEATURE_NAMES}, **product} for product in products]
+
+    np.testing.assert_allclose(engine.predict_batch(products), engine.predict_batch(padded), rtol=1e-6, atol=1e-7)
+
+def test_predict_batch_of_nothing(engine):
+    assert engine.predict_batch([]).shape == (0,)
+
+def test_predict_batch_rejects_wrong_width_matrix(engine):
+    with pytest.raises(ValueError):
+        engine.predict_batch(np.ones((3, len(DEFAULT_FEATURE_NAMES) - 1)))
+
+def test_predict_batch_without_model_keeps_base_prices(tmp_path):
+    engine = DynamicPricingEngine(model_path=str(tmp_path / "missing.pth"),
+                                  registry=ModelRegistry(str(tmp_path / "registry")))
+    products = sample_products(5)
+
+    assert not engine.load_model()
+    np.testing.assert_array_equal(engine.predict_batch(products), [product['base_price'] for product in products])
+    assert engine.predict_batch(products).tolist() == [engine.predict_optimal_price(product) for product in products]
@@ -0,0 +1,99 @@
+"""Checkout reserves stock with one conditional UPDATE per product, in product id order"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models import user, product, order, analytics  # register every mapper
+from app.models.order import CartItem, Order, OrderItem
+from app.models.product import Product
+from app.models.user import User
+from app.api import orders
+from app.api.orders import OrderCreate, PaystackPayment, create_order
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db(engine, monkeypatch):
+    async def no_payment(payment_info, placed):
+        return placed
+
+    monkeypatch.setattr(orders, "process_paystack_payment", no_payment)
+    session = sessionmaker(bind=engine)()
+    session.add(User(email="buyer@example.com", username="buyer", hashed_password="x"))
+    session.add_all([
+        Product(name=f"Product {i}", category="electronics", base_price=100.0,
+                current_price=100.0, stock_quantity=5)
+        for i in range(4)
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+@pytest.fixture
+def buyer(db):
+    return db.query(User).filter(User.username == "buyer").one()
+
+def fill_cart(db, buyer, items):
+    """Add cart rows in the given order, which is deliberately not product id order"""
+    for product_id, quantity in items:
+        db.add(CartItem(user_id=buyer.id, product_id=product_id, quantity=quantity))
+    db.commit()
+
+def checkout(db, buyer):
+    order_data = OrderCreate(
+        shipping_address="Accra",
+        payment_info=PaystackPayment(email="buyer@example.com", amount=1.0)
+    )
+    return asyncio.run(create_order(order_data=order_data, current_user=buyer, db=db))
+
+def stock(db):
+    db.expire_all()
+    return {product.id: product.stock_quantity for product in db.query(Product).order_by(Product.id)}
+
+def test_checkout_reserves_stock_in_product_id_order(engine, db, buyer):
+    fill_cart(db, buyer, [(4, 1), (2, 2), (3, 1), (2, 1)])
+    reserved = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE products SET stock_quantity"):
+            # Positional parameters: quantity taken, product id, quantity required
+            reserved.append((parameters[1], parameters[0]))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        placed = checkout(db, buyer)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    # Duplicate cart rows merge into one reservation, taken in ascending product id order
+    assert reserved == [(2, 3), (3, 1), (4, 1)]
+    assert stock(db) == {1: 5, 2: 2, 3: 4, 4: 4}
+    items = db.query(OrderItem.product_id, OrderItem.quantity).filter(OrderItem.order_id == placed.id)
+    assert sorted(items) == [(2, 3), (3, 1), (4, 1)]
+    assert db.query(CartItem).count() == 0
+
+def test_checkout_with_insufficient_stock_reserves_nothing(db, buyer):
+    fill_cart(db, buyer, [(3, 2), (1, 1), (2, 6)])
+
+    with pytest.raises(HTTPException) as error:
+        checkout(db, buyer)
+
+    assert error.value.status_code == 400
+    assert "Insufficient stock for Product 1" in error.value.detail
+    # Product 1 was reserved before product 2 ran short; the rollback returns it
+    assert stock(db) == {1: 5, 2: 5, 3: 5, 4: 5}
+    assert db.query(Order).count() == 0
+    assert db.query(CartItem).count() == 3
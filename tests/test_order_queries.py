@@ -0,0 +1,106 @@
+"""Order endpoints load items and products eagerly: query count must not grow with the page"""
+
+import asyncio
+from contextlib import contextmanager
+
+import pytest
+from fastapi import Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models import user, product, order, analytics  # register every mapper
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.models.user import User, UserRole
+from app.api.orders import get_all_orders, get_order
+
+ORDERS = 30
+ITEMS_PER_ORDER = 3
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    admin = User(email="admin@example.com", username="admin", hashed_password="x", role=UserRole.ADMIN)
+    session.add(admin)
+    products = [
+        Product(name=f"Product {i}", category="electronics", base_price=10.0 + i,
+                current_price=10.0 + i, stock_quantity=100)
+        for i in range(10)
+    ]
+    session.add_all(products)
+    session.flush()
+    for i in range(ORDERS):
+        placed = Order(user_id=admin.id, total_amount=100.0, status=OrderStatus.PENDING,
+                       shipping_address="Accra")
+        session.add(placed)
+        session.flush()
+        for j in range(ITEMS_PER_ORDER):
+            session.add(OrderItem(order_id=placed.id, product_id=products[(i + j) % len(products)].id,
+                                  quantity=1, price_at_time=10.0))
+    session.commit()
+    session.expunge_all()
+    yield session
+    session.close()
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def admin_user(db):
+    return db.query(User).filter(User.username == "admin").one()
+
+def test_get_all_orders_uses_two_queries(engine, db):
+    admin = admin_user(db)
+    response = Response()
+    with count_queries(engine) as statements:
+        orders = asyncio.run(get_all_orders(
+            response=response, current_user=admin, db=db, status=None, limit=20, offset=0, cursor=None
+        ))
+
+    assert len(orders) == 20
+    assert all(len(placed["items"]) == ITEMS_PER_ORDER for placed in orders)
+    assert all(item["product_name"].startswith("Product") for placed in orders for item in placed["items"])
+    # One query for the page of orders, one for all their items joined to products
+    assert len(statements) == 2
+
+    # The next page through the cursor costs the same
+    db.expunge_all()
+    with count_queries(engine) as statements:
+        next_page = asyncio.run(get_all_orders(
+            response=Response(), current_user=admin, db=db, status=None, limit=20, offset=0,
+            cursor=response.headers["X-Next-Cursor"]
+        ))
+
+    assert len(next_page) == ORDERS - 20
+    assert {placed["id"] for placed in orders}.isdisjoint(placed["id"] for placed in next_page)
+    assert len(statements) == 2
+
+def test_get_order_uses_two_queries(engine, db):
+    admin = admin_user(db)
+    order_id = db.query(Order.id).first()[0]
+    db.expunge_all()
+    with count_queries(engine) as statements:
+        detail = asyncio.run(get_order(order_id=order_id, current_user=admin, db=db))
+
+    assert len(detail["items"]) == ITEMS_PER_ORDER
+    assert len(statements) == 2
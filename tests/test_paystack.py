@@ -0,0 +1,110 @@
+"""Paystack client retries: idempotent requests on any transient failure, POSTs only when never sent"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import paystack_stub
+from app.core.paystack import PaystackClient, PaystackError
+
+class FlakyTransport(httpx.AsyncBaseTransport):
+    """Forwards to the Paystack stub, failing a set number of attempts before or after sending"""
+
+    def __init__(self, fail_before_send: int = 0, fail_after_send: int = 0):
+        self.inner = httpx.ASGITransport(app=paystack_stub.stub_app)
+        self.fail_before_send = fail_before_send
+        self.fail_after_send = fail_after_send
+        self.attempts = 0
+
+    async def handle_async_request(self, request):
+        self.attempts += 1
+        if self.fail_before_send:
+            self.fail_before_send -= 1
+            raise httpx.ConnectError("Connection refused", request=request)
+        response = await self.inner.handle_async_request(request)
+        if self.fail_after_send:
+            # Paystack acted on the request but the response never arrived
+            self.fail_after_send -= 1
+            await response.aread()
+            raise httpx.ReadTimeout("Read timed out", request=request)
+        return response
+
+@pytest.fixture(autouse=True)
+def reset_stub():
+    paystack_stub.transactions.clear()
+    paystack_stub.stub_app.state.fail_next = 0
+    paystack_stub.stub_app.state.latency_seconds = 0.0
+    yield
+
+def make_client(transport):
+    return PaystackClient(base_url="http://paystack.test", secret_key="sk_test", max_retries=3,
+                          backoff_seconds=0, transport=transport)
+
+def call(client, method, *args):
+    async def run():
+        try:
+            return await getattr(client, method)(*args)
+        finally:
+            await client.aclose()
+    return asyncio.run(run())
+
+def initialize_payload(reference="ref-1"):
+    return {"email": "buyer@example.com", "amount": 5000, "currency": "GHS", "reference": reference}
+
+def test_verify_retries_server_errors():
+    paystack_stub.transactions["ref-1"] = {"reference": "ref-1", "status": "success", "amount": 5000}
+    paystack_stub.stub_app.state.fail_next = 2
+    transport = FlakyTransport()
+
+    response = call(make_client(transport), "verify_transaction", "ref-1")
+
+    assert response.status_code == 200
+    assert response.json()["data"]["status"] == "success"
+    assert transport.attempts == 3
+
+def test_verify_retries_lost_responses():
+    paystack_stub.transactions["ref-1"] = {"reference": "ref-1", "status": "success", "amount": 5000}
+    transport = FlakyTransport(fail_after_send=1)
+
+    response = call(make_client(transport), "verify_transaction", "ref-1")
+
+    assert response.status_code == 200
+    assert transport.attempts == 2
+
+def test_initialize_retries_requests_that_were_never_sent():
+    transport = FlakyTransport(fail_before_send=2)
+
+    response = call(make_client(transport), "initialize_transaction", initialize_payload())
+
+    assert response.status_code == 200
+    assert transport.attempts == 3
+    assert list(paystack_stub.transactions) == ["ref-1"]
+
+def test_initialize_does_not_retry_after_sending():
+    transport = FlakyTransport(fail_after_send=1)
+
+    with pytest.raises(PaystackError, match="may still have been processed"):
+        call(make_client(transport), "initialize_transaction", initialize_payload())
+
+    # Retrying would have been rejected as a duplicate reference
+    assert transport.attempts == 1
+    assert list(paystack_stub.transactions) == ["ref-1"]
+
+def test_initialize_does_not_retry_server_errors():
+    paystack_stub.stub_app.state.fail_next = 1
+    transport = FlakyTransport()
+
+    response = call(make_client(transport), "initialize_transaction", initialize_payload())
+
+    assert response.status_code == 503
+    assert transport.attempts == 1
+
+def test_initialize_gives_up_when_paystack_stays_unreachable():
+    transport = FlakyTransport(fail_before_send=10)
+
+    with pytest.raises(PaystackError, match="unreachable"):
+        call(make_client(transport), "initialize_transaction", initialize_payload())
+
+    assert transport.attempts == 4
+    assert not paystack_stub.transactions
@@ -0,0 +1,84 @@
+"""Catalog repricing walks active products in chunks with one prediction and one UPDATE per chunk"""
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models import user, product, order, analytics  # register every mapper
+from app.models.product import Product
+from app.ml import repricing
+
+ACTIVE = 23
+INACTIVE = 4
+
+class MarkupEngine:
+    """Prices every product at 10% over base, except a base price of 13 which it cannot price"""
+
+    def __init__(self):
+        self.batches = []
+
+    def calculate_seasonality_factor(self, month):
+        return 1.0
+
+    def predict_batch(self, features):
+        self.batches.append(len(features))
+        base_prices = features['base_price'].to_numpy()
+        return np.where(base_prices == 13.0, 0.0, base_prices * 1.1)
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    session.add_all([
+        Product(name=f"Product {i}", category="home", base_price=10.0 + i, current_price=10.0 + i,
+                stock_quantity=5, is_active=i < ACTIVE)
+        for i in range(ACTIVE + INACTIVE)
+    ])
+    session.commit()
+    session.close()
+    monkeypatch.setattr(repricing, "SessionLocal", factory)
+    yield factory
+    engine.dispose()
+
+def test_reprices_active_products_in_chunks(session_factory):
+    pricing_engine = MarkupEngine()
+    engine = session_factory.kw["bind"]
+    updates = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE products"):
+            updates.append(len(parameters) if executemany else 1)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        updated = repricing.reprice_active_products(chunk_size=10, pricing_engine=pricing_engine)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert pricing_engine.batches == [10, 10, 3]
+    # One executemany per chunk; the product priced at 0 is left alone
+    assert updates == [9, 10, 3]
+    assert updated == ACTIVE - 1
+
+    session = session_factory()
+    for row in session.query(Product).order_by(Product.id):
+        if row.is_active and row.base_price != 13.0:
+            assert row.current_price == pytest.approx(row.base_price * 1.1)
+        else:
+            assert row.current_price == row.base_price
+    session.close()
+
+def test_reprices_nothing_without_active_products(session_factory):
+    session = session_factory()
+    session.query(Product).update({Product.is_active: False})
+    session.commit()
+    session.close()
+    pricing_engine = MarkupEngine()
+
+    assert repricing.reprice_active_products(chunk_size=10, pricing_engine=pricing_engine) == 0
+    assert pricing_engine.batches == []